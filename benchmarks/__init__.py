@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks
+    ~~~~
+    Micro and macro benchmarks for Flask-CORS. Run them with
+    `python -m benchmarks.run`, which writes the results as JSON.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
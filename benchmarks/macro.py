@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.macro
+    ~~~~
+    End-to-end benchmarks of requests through the Flask test client.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+from flask import Flask
+
+from flask_cors import CORS
+from flask_cors.core import ACL_REQUEST_METHOD, ACL_REQUEST_HEADERS
+from .utils import bench, make_origins, make_resources
+
+ORIGIN_COUNTS = (1, 100, 10000)
+RESOURCE_COUNTS = (1, 100, 1000)
+
+REQUESTS = {
+    'simple': ('GET', {'Origin': 'ALLOWED'}),
+    'preflight': ('OPTIONS', {'Origin': 'ALLOWED',
+                              ACL_REQUEST_METHOD: 'POST',
+                              ACL_REQUEST_HEADERS: 'Content-Type'}),
+    'rejected_origin': ('GET', {'Origin': 'http://rejected.example.org'}),
+    'no_origin': ('GET', {}),
+}
+
+
+def make_app(resources, origins):
+    app = Flask(__name__)
+    CORS(app, resources=resources, origins=origins)
+
+    @app.route('/api/<path:path>', methods=['GET', 'POST'])
+    def api(path):
+        return 'Welcome!'
+
+    return app
+
+
+def bench_requests(name, app, path, allowed_origin, number=200, **params):
+    client = app.test_client()
+    for kind in sorted(REQUESTS):
+        method, headers = REQUESTS[kind]
+        headers = dict((k, allowed_origin if v == 'ALLOWED' else v)
+                       for k, v in headers.items())
+        yield bench(name,
+                    lambda: client.open(path, method=method, headers=headers),
+                    number=number, request=kind, **params)
+
+
+def bench_resources():
+    origins = make_origins(1)
+    for count in RESOURCE_COUNTS:
+        resources = make_resources(count)
+        # Matches the resource with the highest number, which is among the
+        # last to be tried when patterns are matched in turn.
+        path = '/api/r%d/foo' % (count - 1)
+        for result in bench_requests('request', make_app(resources, origins),
+                                     path, origins[0], resources=count,
+                                     origins=1):
+            yield result
+
+
+def bench_origins():
+    resources = make_resources(1)
+    for count in ORIGIN_COUNTS:
+        origins = make_origins(count)
+        for result in bench_requests('request', make_app(resources, origins),
+                                     '/api/r0/foo', origins[-1], resources=1,
+                                     origins=count):
+            yield result
+
+
+BENCHMARKS = [bench_resources, bench_origins]
+
+
+def run():
+    results = []
+    for benchmark in BENCHMARKS:
+        results.extend(benchmark())
+    return results
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.micro
+    ~~~~
+    Microbenchmarks of the functions on Flask-CORS' request path.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+from flask import Flask
+
+from flask_cors import CORS, cross_origin
+from flask_cors.core import *
+from .utils import bench, make_origins, make_resources
+
+ORIGIN_COUNTS = (1, 100, 10000)
+RESOURCE_COUNTS = (1, 100, 1000)
+
+
+def bench_get_cors_headers():
+    for count in ORIGIN_COUNTS:
+        origins = make_origins(count)
+        options = serialize_options(dict(DEFAULT_OPTIONS, origins=origins))
+        request_headers = {'Origin': origins[-1]}
+        preflight_headers = {'Origin': origins[-1],
+                             ACL_REQUEST_METHOD: 'POST',
+                             ACL_REQUEST_HEADERS: 'Content-Type, X-Foo'}
+
+        # Serialized options, as callers of the public helpers pass them,
+        # and the compiled policy which the extension and decorator use.
+        for compiled in False, True:
+            opts = compile_policy(options) if compiled else options
+            params = dict(compiled=True) if compiled else {}
+            yield bench('get_cors_headers',
+                        lambda: get_cors_headers(opts, request_headers,
+                                                 'GET', {}),
+                        origins=count, kind='simple', **params)
+            yield bench('get_cors_headers',
+                        lambda: get_cors_headers(opts, preflight_headers,
+                                                 'OPTIONS', {}),
+                        origins=count, kind='preflight', **params)
+
+
+def bench_try_match_any():
+    for count in ORIGIN_COUNTS:
+        origins = make_origins(count)
+        number = max(1, 10000 // count)
+        yield bench('try_match_any',
+                    lambda: try_match_any(origins[-1], origins),
+                    number=number, origins=count)
+
+
+def bench_parse_resources():
+    for count in RESOURCE_COUNTS:
+        resources = make_resources(count)
+        number = max(1, 10000 // count)
+        yield bench('parse_resources',
+                    lambda: parse_resources(resources),
+                    number=number, resources=count)
+
+
+def bench_serialize_options():
+    for count in ORIGIN_COUNTS:
+        opts = dict(DEFAULT_OPTIONS, origins=make_origins(count))
+        number = max(1, 10000 // count)
+        yield bench('serialize_options',
+                    lambda: serialize_options(opts),
+                    number=number, origins=count)
+
+
+def bench_decorator():
+    app = Flask(__name__)
+
+    @app.route('/')
+    @cross_origin()
+    def index():
+        return 'Welcome!'
+
+    ctx = app.test_request_context('/',
+                                   headers={'Origin': 'http://foo.com'})
+    ctx.push()
+    try:
+        yield bench('cross_origin', index)
+    finally:
+        ctx.pop()
+
+
+def bench_after_request():
+    for count in RESOURCE_COUNTS:
+        app = Flask(__name__)
+        CORS(app, resources=make_resources(count))
+        cors_after_request = app.after_request_funcs[None][-1]
+
+        # The last resource is the one whose pattern sorts last, which is
+        # the worst case for matching the resources in turn.
+        pattern = parse_resources(make_resources(count))[-1][0]
+        path = pattern.replace('.*', 'foo')
+
+        ctx = app.test_request_context(path,
+                                       headers={'Origin': 'http://foo.com'})
+        ctx.push()
+        try:
+            # Includes the cost of building a fresh response, as headers are
+            # not evaluated again for a response which already has them.
+            yield bench('cors_after_request',
+                        lambda: cors_after_request(app.response_class('')),
+                        resources=count)
+        finally:
+            ctx.pop()
+
+
+BENCHMARKS = [bench_get_cors_headers, bench_try_match_any,
+              bench_parse_resources, bench_serialize_options,
+              bench_decorator, bench_after_request]
+
+
+def run():
+    results = []
+    for benchmark in BENCHMARKS:
+        results.extend(benchmark())
+    return results
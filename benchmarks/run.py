@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.run
+    ~~~~
+    Runs the benchmarks and writes the results as JSON, along with the
+    versions of Python, Flask and Flask-CORS, so results can be compared
+    from release to release.
+
+    Usage: python -m benchmarks.run [--suite micro|macro] [--output FILE]
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+
+import flask
+import flask_cors
+from . import micro, macro
+
+SUITES = {'micro': micro, 'macro': macro}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('~~~~')[0])
+    parser.add_argument('--suite', choices=sorted(SUITES), action='append',
+                        help='Suite to run. May be repeated. Default: all.')
+    parser.add_argument('--output', default='-',
+                        help='File to write the JSON results to. '
+                             'Default: stdout.')
+    args = parser.parse_args(argv)
+
+    # Benchmarks measure the request path, not the cost of emitting logs
+    logging.disable(logging.CRITICAL)
+
+    results = []
+    for name in args.suite or sorted(SUITES):
+        for result in SUITES[name].run():
+            result['suite'] = name
+            results.append(result)
+
+    report = dict(python=platform.python_version(),
+                  implementation=platform.python_implementation(),
+                  flask=flask.__version__,
+                  flask_cors=flask_cors.__version__,
+                  results=results)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output == '-':
+        sys.stdout.write(output + '\n')
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
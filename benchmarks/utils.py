@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.utils
+    ~~~~
+    Helpers shared by the micro and macro benchmarks.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import timeit
+
+
+def bench(name, func, number=1000, repeat=5, **params):
+    '''
+        Times `number` calls of func, `repeat` times, and returns a
+        dictionary describing the result. Times are per call, in nanoseconds.
+        The best time is the most reproducible, the median shows the spread.
+    '''
+    timings = sorted(timeit.Timer(func).repeat(repeat=repeat, number=number))
+    per_call = [t / number * 1e9 for t in timings]
+    return dict(name=name,
+                params=params,
+                number=number,
+                repeat=repeat,
+                best_ns=per_call[0],
+                median_ns=per_call[len(per_call) // 2])
+
+
+def make_origins(count):
+    return ['http://origin%d.example.com' % i for i in range(count)]
+
+
+def make_resources(count, **options):
+    '''
+        Returns a resources dictionary of `count` distinct prefix patterns,
+        each with the given options.
+    '''
+    return dict((r'/api/r%d/.*' % i, options) for i in range(count))
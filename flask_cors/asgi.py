@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+    flask_cors
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    This module requires Python 3.5 or later.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import asyncio
+import functools
+from .core import *
+from .origins import DEFAULT_PORTS
+
+
+class CORSMiddleware(object):
+    '''
+        ASGI middleware which applies Cross Origin Resource Sharing to any
+        ASGI application, e.g. a Quart app or a Flask app wrapped by asgiref.
+        The arguments and behaviour are identical to
+        :py:class:`flask_cors.wsgi.CORSMiddleware`.
+
+        Everything runs on the event loop: valid preflight requests to
+        matching resources, and requests from disallowed origins to resources
+        with the `reject_disallowed_origins` option, are answered from the
+        connection scope without calling the wrapped application, and CORS
+        headers are added to the `http.response.start` message of other
+        responses. The exception is origins which must be looked up in an
+        origin store, with no cached answer, which are evaluated in the
+        loop's default executor, so that a slow store never blocks the loop.
+
+        :param app: the ASGI application to wrap.
+
+        :param config: a mapping of CORS_* configuration values.
+
+        :type config: dict or None
+    '''
+
+    def __init__(self, app, config=None, **kwargs):
+        self.app = app
+        options = get_config_cors_options(config or {}, kwargs)
+        self.router = ResourceRouter(
+            get_config_resources(config or {}, kwargs),
+            max_length=options.get('max_match_length'))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        request_headers = get_scope_cors_headers(scope)
+        if not request_headers.get('Origin'):
+            return await self.app(scope, receive, send)
+
+        matched = self.router.match(get_scope_path(scope))
+        if matched is None:
+            return await self.app(scope, receive, send)
+
+        policy = matched[1]
+        method = scope['method'].upper()
+        origin = request_headers['Origin']
+
+        if policy.reject_disallowed_origins and await run_evaluation(
+                policy, origin, origin_rejected,
+                policy, origin, get_scope_host_url(scope)):
+            debugLog("Rejecting request from disallowed Origin:%s", origin)
+            status, headers, body = get_rejection(policy)
+            await send({'type': 'http.response.start',
+                        'status': status,
+                        'headers': encode_headers(headers)})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        if method == 'OPTIONS' and request_headers.get(ACL_REQUEST_METHOD):
+            headers = await run_evaluation(policy, origin,
+                                           get_cors_header_items, policy,
+                                           request_headers, method, {})
+            # Access-Control-Allow-Methods is only set for valid preflights
+            if any(k == ACL_METHODS for k, _ in headers):
+                await send({'type': 'http.response.start',
+                            'status': 204,
+                            'headers': encode_headers(headers)})
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+
+        async def cors_send(message):
+            if message['type'] == 'http.response.start':
+                message = dict(message)
+                message['headers'] = await run_evaluation(
+                    policy, origin, add_cors_headers, policy,
+                    request_headers, method, list(message.get('headers', [])))
+            await send(message)
+
+        return await self.app(scope, receive, cors_send)
+
+
+async def run_evaluation(policy, origin, func, *args):
+    '''
+        Returns the result of calling `func` with the given arguments, which
+        evaluate the given Origin against the policy. If the policy has
+        origin stores without a cached answer for the origin, it is called in
+        the event loop's default executor, as looking the origin up may
+        block, and otherwise directly.
+    '''
+    if not policy.origin_stores:
+        return func(*args)
+    canonical = canonicalize_origin(origin)
+    if canonical is None or all(store.cached(canonical)
+                                for store in policy.origin_stores):
+        return func(*args)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+def get_scope_path(scope):
+    '''
+        Returns the request path as Flask's `request.path` would, without the
+        root path the application is mounted at.
+    '''
+    path = scope.get('path', '')
+    root_path = scope.get('root_path', '')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    return '/' + path.lstrip('/')
+
+
+def get_scope_host_url(scope):
+    '''
+        Returns the origin of the request itself, e.g. 'http://localhost',
+        from the Host header of an ASGI connection scope, or its server.
+    '''
+    scheme = scope.get('scheme', 'http')
+    for name, value in scope.get('headers', ()):
+        if name.lower() == b'host':
+            return '%s://%s' % (scheme, value.decode('latin-1'))
+    server = scope.get('server')
+    if not server:
+        return ''
+    host, port = server
+    if port is None or str(port) == DEFAULT_PORTS.get(scheme):
+        return '%s://%s' % (scheme, host)
+    return '%s://%s:%s' % (scheme, host, port)
+
+
+def get_scope_cors_headers(scope):
+    '''
+        Returns a dictionary of the request headers which are relevant to
+        CORS, from an ASGI connection scope.
+    '''
+    headers = {}
+    for name, value in scope.get('headers', ()):
+        name = name.lower()
+        if name in ASGI_REQUEST_HEADERS:
+            headers[ASGI_REQUEST_HEADERS[name]] = value.decode('latin-1')
+    return headers
+
+
+def encode_headers(headers):
+    return [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+
+def add_cors_headers(policy, request_headers, method, response_headers):
+    '''
+        Returns the given list of ASGI response headers with the CORS headers
+        for the request added, replacing any existing headers of the same
+        name.
+    '''
+    vary = []
+    for name, value in response_headers:
+        lower_name = name.lower()
+        if lower_name == b'access-control-allow-origin':
+            debugLog('CORS have been already evaluated, skipping')
+            return response_headers
+        elif lower_name == b'vary':
+            vary.append(value.decode('latin-1'))
+
+    existing = {'Vary': ', '.join(vary)} if vary else {}
+    headers = get_cors_header_items(policy, request_headers, method, existing)
+    if not headers:
+        return response_headers
+
+    replaced = set(k.lower().encode('latin-1') for k, _ in headers)
+    response_headers = [(name, value) for name, value in response_headers
+                        if name.lower() not in replaced]
+    response_headers.extend(encode_headers(headers))
+    return response_headers
+
+
+# Request headers relevant to CORS, by their lower case ASGI names
+ASGI_REQUEST_HEADERS = dict(
+    (name.lower().encode('latin-1'), name)
+    for name in ('Origin', ACL_REQUEST_METHOD, ACL_REQUEST_HEADERS)
+)
@@ -9,11 +9,24 @@
     :license: MIT, see LICENSE for more details.
 """
 import re
+import sys
 import logging
+import weakref
+import threading
 import collections
 from datetime import timedelta
 from six import string_types
+try:
+    from collections import OrderedDict
+except ImportError:  # Python 2.6
+    OrderedDict = None
 from flask import request, current_app
+from .stores import OriginStore, CachedOriginStore
+from .patterns import check_patterns
+from .origins import (SubdomainTrie, OriginRangeTable, OriginFile,
+                      parse_subdomain_pattern, parse_range_pattern,
+                      build_origin_prefilter, get_origin_keys,
+                      canonicalize_origin)
 try:
     from flask import _app_ctx_stack as stack
 except ImportError:
@@ -44,16 +57,57 @@ CONFIG_OPTIONS = ['CORS_ORIGINS', 'CORS_METHODS', 'CORS_ALLOW_HEADERS',
                   'CORS_EXPOSE_HEADERS', 'CORS_SUPPORTS_CREDENTIALS',
                   'CORS_MAX_AGE', 'CORS_SEND_WILDCARD',
                   'CORS_AUTOMATIC_OPTIONS', 'CORS_VARY_HEADER',
-                  'CORS_RESOURCES', 'CORS_INTERCEPT_EXCEPTIONS']
+                  'CORS_RESOURCES', 'CORS_INTERCEPT_EXCEPTIONS',
+                  'CORS_DECISION_CACHE_SIZE', 'CORS_SHORT_CIRCUIT_PREFLIGHT',
+                  'CORS_METRICS', 'CORS_REJECT_DISALLOWED_ORIGINS',
+                  'CORS_REJECT_STATUS', 'CORS_REJECT_BODY',
+                  'CORS_ORIGIN_CACHE_TTL', 'CORS_ORIGIN_NEGATIVE_CACHE_TTL',
+                  'CORS_ORIGIN_CACHE_SIZE', 'CORS_ORIGIN_CACHE_STALE_TTL',
+                  'CORS_ORIGIN_LOOKUP_TIMEOUT', 'CORS_ORIGIN_LOOKUP_FAIL_OPEN',
+                  'CORS_ORIGIN_PREFILTER', 'CORS_PATTERN_SAFETY',
+                  'CORS_MAX_MATCH_LENGTH']
 
 # Attribute added to request object by decorator to indicate that CORS
 # was evaluated, in case the decorator and extension are both applied
 # to a view.
 FLASK_CORS_EVALUATED = '_FLASK_CORS_EVALUATED'
 
+# Attribute added to responses by the extension once their evaluation has
+# been recorded in its metrics, as responses to requests whose view raised
+# pass through its after_request handler twice.
+FLASK_CORS_RECORDED = '_FLASK_CORS_RECORDED'
+
+# Attribute added to view functions by the decorator, so that the extension
+# can defer to the decorator's options for those views.
+FLASK_CORS_DECORATED = '_FLASK_CORS_DECORATED'
+
 # Strange, but this gets the type of a compiled regex, which is otherwise not
 # exposed in a public API.
 RegexObject = type(re.compile(''))
+
+# Characters which give a resource pattern a meaning other than a literal
+# path prefix.
+REGEX_METACHARACTERS = frozenset('.^$*+?{}[]\\|()')
+
+# Constructs which depend on the numbering or global flags of a regular
+# expression, and so cannot be embedded in a larger alternation.
+UNCOMBINABLE_REGEX = re.compile(r'\\\d|\(\?(?:P=|\(|[aiLmsux])')
+
+
+# The number of distinct Access-Control-Request-Headers values for which the
+# allowed headers are memoized, per set of options.
+ALLOW_HEADERS_MEMO_SIZE = 128
+
+# The number of recently used policies kept alive by compile_policy, so that
+# options passed as plain dictionaries are not recompiled on every call.
+POLICY_CACHE_SIZE = 128
+
+# The number of compiled patterns memoized by compile_pattern.
+COMPILED_PATTERN_MEMO_SIZE = 4096
+_compiled_patterns = {}
+
+# Older versions of Python limit the number of groups in a regular expression.
+MAX_COMBINED_GROUPS = 99 if sys.version_info < (3, 5) else None
 DEFAULT_OPTIONS = dict(origins='*',
                        methods=ALL_METHODS,
                        allow_headers='*',
@@ -112,22 +166,263 @@ def get_regexp_pattern(regexp):
         return str(regexp)
 
 
-def get_cors_origin(options, request_origin):
-    origins = options.get('origins')
-    wildcard = r'.*' in origins
+def get_literal_prefix(pattern):
+    '''
+        Returns the literal path prefix matched by a plain prefix pattern,
+        such as r'/api/v1/.*' or r'/api/*', or None if the pattern is any
+        other regular expression.
+
+        Resource patterns are matched from the start of the path, so a
+        literal, optionally followed by a single starred atom, matches exactly
+        the paths which start with that literal.
+    '''
+    if not isinstance(pattern, string_types):
+        return None
+
+    literal = pattern
+    if len(literal) > 1 and literal[-1] == '*' and (
+            literal[-2] == '.' or literal[-2] not in REGEX_METACHARACTERS):
+        literal = literal[:-2]
+
+    if any(c in REGEX_METACHARACTERS for c in literal):
+        return None
+    return literal
+
+
+class ResourceRouter(object):
+    '''
+        Matches request paths against an ordered list of resources, of the
+        form returned by :py:func:`parse_resources`, and returns the first
+        matching (pattern, options) pair, exactly as trying each pattern in
+        turn with :py:func:`try_match` would.
+
+        Rather than evaluating each pattern in turn, plain prefix patterns are
+        stored in a trie which is walked once per path, and the remaining
+        regular expressions are combined into as few alternations as
+        possible, each of which identifies the pattern that matched through
+        a named group.
+
+        If `max_length` is given, the regular expressions are not evaluated
+        against longer paths, which only match plain prefix patterns.
+    '''
+
+    def __init__(self, resources, max_length=None):
+        self.resources = list(resources)
+        self.max_length = max_length
+        self._trie = {}
+        self._rules = {}
+        regexps = []
+
+        for index, (pattern, _) in enumerate(self.resources):
+            prefix = get_literal_prefix(pattern)
+            if prefix is None:
+                regexps.append((index, pattern))
+            else:
+                self._add_prefix(prefix.lower(), index)
+
+        self._segments = self._compile_segments(regexps)
+
+    def _add_prefix(self, prefix, index):
+        node = self._trie
+        for c in prefix:
+            node = node.setdefault(c, {})
+        # Terminal nodes store the index of the resource under the None key.
+        # Where several patterns share a prefix, the first one wins.
+        if node.get(None, index) >= index:
+            node[None] = index
+
+    def _compile_segments(self, regexps):
+        '''
+            Compiles the (index, pattern) pairs, in order, into a list of
+            (first_index, matcher) pairs, where matcher returns the index of
+            the first pattern which matches a given path, or None.
+        '''
+        segments = []
+        run = []
+
+        def flush():
+            if run:
+                segments.extend(self._combine(run))
+                del run[:]
+
+        for index, pattern in regexps:
+            compiled = compile_pattern(pattern)
+            if not isinstance(compiled, RegexObject):
+                # Invalid regular expressions are compared as literal strings.
+                flush()
+                segments.append((index, self._literal_matcher(index, pattern)))
+                continue
+
+            if (not isinstance(compiled.pattern, string_types)
+                    or UNCOMBINABLE_REGEX.search(compiled.pattern)):
+                flush()
+                segments.append((index, self._regex_matcher(index, compiled)))
+                continue
+
+            if run and (run[0][1].flags != compiled.flags or (
+                    MAX_COMBINED_GROUPS is not None and
+                    sum(c.groups + 1 for _, c in run) + compiled.groups + 1 >
+                    MAX_COMBINED_GROUPS)):
+                flush()
+            run.append((index, compiled))
+
+        flush()
+        return segments
+
+    def _combine(self, run):
+        if len(run) == 1:
+            index, compiled = run[0]
+            return [(index, self._regex_matcher(index, compiled))]
+
+        names = dict(('r%d' % index, index) for index, _ in run)
+        try:
+            combined = re.compile(
+                '|'.join('(?P<r%d>%s)' % (index, compiled.pattern)
+                         for index, compiled in run),
+                run[0][1].flags)
+        except Exception:
+            return [(index, self._regex_matcher(index, compiled))
+                    for index, compiled in run]
+
+        def matcher(path, match=combined.match, names=names):
+            m = match(path)
+            return names[m.lastgroup] if m else None
+        return [(run[0][0], matcher)]
+
+    @staticmethod
+    def _regex_matcher(index, compiled):
+        def matcher(path, match=compiled.match):
+            return index if match(path) else None
+        return matcher
+
+    @staticmethod
+    def _literal_matcher(index, pattern):
+        def matcher(path):
+            return index if path == pattern else None
+        return matcher
+
+    def _match_prefix(self, path):
+        '''
+            Returns the index of the first prefix pattern matching the path,
+            or None, along with the trie node reached at the end of the
+            path, or None if the walk stopped early.
+        '''
+        node = self._trie
+        best = node.get(None)
+        for c in path.lower():
+            node = node.get(c)
+            if node is None:
+                break
+            index = node.get(None)
+            if index is not None and (best is None or index < best):
+                best = index
+        return best, node
+
+    @staticmethod
+    def _min_descendant_index(node):
+        best = None
+        stack = [child for c, child in node.items() if c is not None]
+        while stack:
+            node = stack.pop()
+            for c, child in node.items():
+                if c is None:
+                    if best is None or child < best:
+                        best = child
+                else:
+                    stack.append(child)
+        return best
+
+    def match(self, path):
+        '''
+            Returns the (pattern, options) pair of the first resource which
+            matches the given path, or None if no resource matches.
+        '''
+        best = self._match_prefix(path)[0]
+        segments = self._segments
+        if self.max_length is not None and len(path) > self.max_length:
+            segments = ()
+
+        for first_index, matcher in segments:
+            if best is not None and first_index > best:
+                break
+            index = matcher(path)
+            if index is not None:
+                if best is None or index < best:
+                    best = index
+                break
+
+        if best is None:
+            return None
+        return self.resources[best]
+
+    def match_rule(self, rule, path):
+        '''
+            Returns the same result as :py:meth:`match` for a path which was
+            routed to the given URL rule (e.g. `request.url_rule`).
+
+            The first time a rule is seen, the router determines whether the
+            resource matching any path of the rule can be known from the rule
+            alone. If so, the result is stored, keyed by the rule, and later
+            lookups cost a single dictionary lookup. Otherwise, and if the
+            rule is None, the path is matched as usual.
+        '''
+        if rule is None:
+            return self.match(path)
+
+        entry = self._rules.get(id(rule))
+        # Rules are not hashable, so they are keyed by identity. Check that
+        # the rule is the one the entry was resolved for, in case an id is
+        # reused.
+        if entry is None or entry[0] is not rule:
+            entry = (rule,) + self._resolve_rule(rule.rule)
+            self._rules[id(rule)] = entry
+
+        if entry[1]:
+            return entry[2]
+        return self.match(path)
+
+    def _resolve_rule(self, rule_string):
+        '''
+            Returns a (resolved, match) pair, where resolved is True if all
+            paths matching the given rule string match the same resource.
+        '''
+        # A rule without variable parts matches exactly one path
+        if '<' not in rule_string:
+            return True, self.match(rule_string)
+
+        # Otherwise, only the static prefix of the path is known. Prefix
+        # patterns no longer than the static prefix either match all paths of
+        # the rule, or none of them.
+        static_prefix = rule_string.split('<', 1)[0]
+        best, node = self._match_prefix(static_prefix)
+
+        # Longer prefix patterns, which start with the static prefix, and
+        # other regular expressions may match only some of the paths. The
+        # result is only known if the best match takes precedence over them.
+        if node is not None:
+            longer = self._min_descendant_index(node)
+            if longer is not None and (best is None or longer < best):
+                return False, None
+        if self._segments and (best is None or self._segments[0][0] < best):
+            return False, None
+
+        return True, (self.resources[best] if best is not None else None)
 
+
+def get_cors_origin(options, request_origin):
+    policy = as_policy(options)
     # If the Origin header is not present terminate this set of steps.
     # The request is outside the scope of this specification.-- W3Spec
     if request_origin:
         debugLog("CORS request received with 'Origin' %s", request_origin)
 
         # If the allowed origins is an asterisk or 'wildcard', always match
-        if wildcard and options.get('send_wildcard'):
+        if policy.is_wildcard and policy.send_wildcard:
             debugLog("Allowed origins are set to '*', assuming valid request")
             return '*'
         # If the value of the Origin header is a case-sensitive match
         # for any of the values in list of origins
-        elif try_match_any(request_origin, origins):
+        elif match_origin(policy, request_origin):
             debugLog("Given origin matches set of allowed origins")
             # Add a single Access-Control-Allow-Origin header, with either
             # the value of the Origin header or the string "*" as value.
@@ -135,7 +430,7 @@ def get_cors_origin(options, request_origin):
             return request_origin
         else:
             debugLog("Given origin does not match any of allowed origins: %s",
-                  map(get_regexp_pattern, origins))
+                     LazyString(get_regexp_patterns, policy.origins))
             return None
     # Terminate these steps, return the original request untouched.
     else:
@@ -143,35 +438,185 @@ def get_cors_origin(options, request_origin):
         return None
 
 
+def match_origin(options, request_origin):
+    '''
+        Returns True if the request origin is allowed by the classified
+        origins of the given policy. The origin is canonicalized first, as
+        for :py:func:`canonicalize_origin`, and everything but the wildcard
+        and regular expressions, which see the origin as it was sent, is
+        matched against its canonical form. If the policy has a prefilter,
+        origins it rejects are disallowed immediately. Literal origins and the
+        wildcard are checked first, with a single hash lookup, then subdomain
+        patterns, with one lookup per label of the origin's host, then CIDR
+        and port range rules and origin files, with binary searches, then
+        regular expressions, unless the origin is longer than the policy's
+        `max_match_length`, then any origin stores.
+    '''
+    policy = as_policy(options)
+    origin = canonicalize_origin(request_origin)
+    if origin is None:
+        # Malformed origins are only allowed by the wildcard, by being given
+        # literally, or by a regular expression.
+        if policy.is_wildcard or request_origin.lower() in policy.origins_literal:
+            return True
+        return match_origin_regex(policy, request_origin)
+
+    prefilter = policy.origin_prefilter
+    if prefilter is not None and not prefilter.check(get_origin_keys(origin)):
+        return False
+    if origin in policy.origins_literal or policy.is_wildcard:
+        return True
+    if policy.origins_subdomain is not None and policy.origins_subdomain.match(origin):
+        return True
+    if policy.origins_range is not None and policy.origins_range.match(origin):
+        return True
+    for origin_file in policy.origin_files:
+        if origin in origin_file:
+            return True
+    # Regular expressions are written against the origin as sent, e.g. with
+    # its case and port, so are not matched against the canonical form.
+    if match_origin_regex(policy, request_origin):
+        return True
+    for store in policy.origin_stores:
+        if store.contains(origin):
+            return True
+    if prefilter is not None:
+        prefilter.false_positives += 1
+    return False
+
+
+def match_origin_regex(policy, origin):
+    '''
+        Returns True if the origin matches any of the policy's regular
+        expressions, and is no longer than its `max_match_length`.
+    '''
+    max_length = policy.max_match_length
+    if max_length is not None and len(origin) > max_length:
+        return False
+    for regex in policy.origins_regex:
+        if regex.match(origin):
+            return True
+    return False
+
+
+def origin_rejected(options, request_origin, host_url):
+    '''
+        Returns True if the policy rejects requests from disallowed origins,
+        and the given Origin is neither allowed by it, nor the origin of the
+        request itself, as given by the request's `host_url`. Browsers send
+        an Origin header with some same-origin requests, which are never
+        rejected.
+    '''
+    policy = as_policy(options)
+    if not (policy.reject_disallowed_origins and request_origin):
+        return False
+    if match_origin(policy, request_origin):
+        return False
+    own_origin = host_url.rstrip('/')
+    return ((canonicalize_origin(request_origin) or request_origin.lower()) !=
+            (canonicalize_origin(own_origin) or own_origin.lower()))
+
+
+def reject_disallowed_origin(options):
+    '''
+        Returns a response rejecting the current request, with the policy's
+        rejection status and body, if it comes from an origin which the
+        policy rejects. Otherwise, returns None.
+    '''
+    policy = as_policy(options)
+    request_origin = request.headers.get('Origin')
+    if not origin_rejected(policy, request_origin, request.host_url):
+        return None
+
+    infoLog("Rejecting request from disallowed Origin:%s", request_origin)
+    resp = current_app.response_class(policy.reject_body,
+                                      status=policy.reject_status)
+    setattr(resp, FLASK_CORS_EVALUATED, True)
+    return resp
+
+
+def get_rejection(options):
+    '''
+        Returns the (status, headers, body) of the response rejecting a
+        request from a disallowed origin, as (int, list of (name, value)
+        pairs, bytes), for the WSGI and ASGI middlewares, which have no
+        response class.
+    '''
+    policy = as_policy(options)
+    body = policy.reject_body
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    return policy.reject_status, [('Content-Type', 'text/html; charset=utf-8'),
+                                  ('Content-Length', str(len(body)))], body
+
+
 def get_allow_headers(options, acl_request_headers):
     if acl_request_headers:
+        policy = as_policy(options)
+        # Browsers send the same few combinations of headers over and over,
+        # so the result for each raw header value is memoized per policy.
+        memo = policy.allow_headers_memo
+        allowed = memo.get(acl_request_headers)
+        if allowed is not None:
+            return allowed
+
         request_headers = [h.strip() for h in acl_request_headers.split(',')]
 
-        # any header that matches in the allow_headers
-        matching_headers = filter(
-            lambda h: try_match_any(h, options.get('allow_headers')),
-            request_headers
-        )
+        if policy.allow_headers_wildcard:
+            matching_headers = request_headers
+        else:
+            # any header that matches in the allow_headers
+            matching_headers = [h for h in request_headers
+                                if match_allow_header(policy, h)]
 
-        return ', '.join(sorted(matching_headers))
+        allowed = ', '.join(sorted(matching_headers))
+        memo.put(acl_request_headers, allowed)
+        return allowed
 
     return None
 
 
+def match_allow_header(policy, header):
+    '''
+        Returns True if the given request header is allowed by the policy's
+        precompiled `allow_headers`, i.e. if it is one of the patterns which
+        are not valid regular expressions, or matches one of the others.
+    '''
+    if header in policy.allow_headers_literal:
+        return True
+    max_length = policy.max_match_length
+    if max_length is not None and len(header) > max_length:
+        return False
+    for match in policy.allow_headers_regex:
+        if match(header):
+            return True
+    return False
+
+
 def get_cors_headers(options, request_headers, request_method, response_headers):
-    origin_to_set = get_cors_origin(options, request_headers.get('Origin'))
-    headers = {}
+    return dict(get_cors_header_list(as_policy(options), request_headers,
+                                     request_method, response_headers))
+
+
+def get_cors_header_list(policy, request_headers, request_method, response_headers):
+    '''
+        Returns the CORS headers for a request as a list of (header, value)
+        pairs. The headers which do not depend on the request are rendered by
+        the policy when it is compiled, so only the allowed origin, allowed
+        headers and Vary header are computed here.
+    '''
+    origin_to_set = get_cors_origin(policy, request_headers.get('Origin'))
 
     if origin_to_set is None:  # CORS is not enabled for this route
-        return headers
+        return []
     infoLog("Request from Origin:%s, setting %s:%s",
                      request_headers.get('Origin'), ACL_ORIGIN, origin_to_set)
 
-    headers[ACL_ORIGIN] = origin_to_set
-    headers[ACL_EXPOSE_HEADERS] = options.get('expose_headers')
-
-    if options.get('supports_credentials'):
-        headers[ACL_CREDENTIALS] = 'true'  # case sensative
+    if origin_to_set == '*':
+        headers = list(policy.wildcard_headers)
+    else:
+        headers = [(ACL_ORIGIN, origin_to_set)]
+        headers.extend(policy.response_headers)
 
     # This is a preflight request
     # http://www.w3.org/TR/cors/#resource-preflight-requests
@@ -180,28 +625,28 @@ def get_cors_headers(options, request_headers, request_method, response_headers)
 
         # If there is no Access-Control-Request-Method header or if parsing
         # failed, do not set any additional headers
-        if acl_request_method and acl_request_method in options.get('methods'):
+        if acl_request_method and acl_request_method in policy.methods:
 
             # If method is not a case-sensitive match for any of the values in
             # list of methods do not set any additional headers and terminate
             # this set of steps.
-            headers[ACL_ALLOW_HEADERS] = get_allow_headers(options, request_headers.get(ACL_REQUEST_HEADERS))
-            headers[ACL_MAX_AGE] = options.get('max_age')
-            headers[ACL_METHODS] = options.get('methods')
+            allow_headers = get_allow_headers(policy, request_headers.get(ACL_REQUEST_HEADERS))
+            if allow_headers:
+                headers.append((ACL_ALLOW_HEADERS, allow_headers))
+            headers.extend(policy.preflight_headers)
         else:
             infoLog("Access-Control-Request-Method:%s does not match allowed methods %s",
-                             acl_request_method, options.get('methods'))
+                             acl_request_method, policy.methods_header)
 
     # http://www.w3.org/TR/cors/#resource-implementation
-    if options.get('vary_header'):
-        # Only set header if the origin returned will vary dynamically,
-        # i.e. if we are not returning an asterisk, and there are multiple
-        # origins that can be matched.
-        if headers[ACL_ORIGIN] != '*' and len(options.get('origins')) > 1:
-            vary = ['Origin', response_headers.get('Vary')]
-            headers['Vary'] = ', '. join(v for v in vary if v is not None)
+    # Only set header if the origin returned will vary dynamically,
+    # i.e. if we are not returning an asterisk, and there are multiple
+    # origins that can be matched.
+    if policy.needs_vary:
+        vary = response_headers.get('Vary')
+        headers.append(('Vary', 'Origin' if vary is None else 'Origin, ' + vary))
 
-    return dict((k, v) for k, v in headers.items() if v)
+    return headers
 
 
 def set_cors_headers(resp, options):
@@ -218,16 +663,130 @@ def set_cors_headers(resp, options):
         debugLog('CORS have been already evaluated, skipping')
         return resp
 
-    headers_to_set = get_cors_headers(options,
-                                       request.headers,
-                                       request.method,
-                                       resp.headers)
-    debugLog('Settings CORS headers: %s', str(headers_to_set))
+    headers_to_set = get_cors_header_items(options,
+                                           request.headers,
+                                           request.method,
+                                           resp.headers)
+    debugLog('Settings CORS headers: %s', headers_to_set)
+    extend_headers(resp.headers, headers_to_set)
+    return resp
 
-    for k, v in headers_to_set.items():
-        resp.headers[k] = v
 
-    return resp
+def extend_headers(headers, items):
+    '''
+        Adds the given (header, value) pairs to a werkzeug Headers object
+        with a single call to `extend`, unless any of them is already set, in
+        which case each header is replaced instead.
+    '''
+    if any(k in headers for k, _ in items):
+        for k, v in items:
+            headers[k] = v
+    else:
+        headers.extend(items)
+
+
+def get_cors_header_items(options, request_headers, request_method, response_headers):
+    '''
+        Returns the CORS headers to set as a tuple of (header, value) pairs,
+        consulting the policy's decision cache, if one is configured, before
+        evaluating :py:func:`get_cors_header_list`.
+    '''
+    policy = as_policy(options)
+    cache = policy.decision_cache
+    if cache is None:
+        return tuple(get_cors_header_list(policy, request_headers,
+                                          request_method, response_headers))
+
+    # The request's Access-Control-Request-* headers only affect preflights.
+    if request_method == 'OPTIONS':
+        key = (request_headers.get('Origin'),
+               request_method,
+               request_headers.get(ACL_REQUEST_METHOD),
+               request_headers.get(ACL_REQUEST_HEADERS),
+               response_headers.get('Vary'))
+    else:
+        key = (request_headers.get('Origin'),
+               request_method,
+               None,
+               None,
+               response_headers.get('Vary'))
+
+    items = cache.get(key)
+    if items is None:
+        items = tuple(get_cors_header_list(policy, request_headers,
+                                           request_method, response_headers))
+        cache.put(key, items)
+    return items
+
+
+class DecisionCache(object):
+    '''
+        A bounded, thread-safe LRU cache, used to map the inputs which
+        determine the CORS headers of a response to the headers themselves,
+        and to memoize the allowed headers of preflight requests.
+
+        The cache is divided into a number of stripes, each with its own lock,
+        so that concurrent requests rarely contend. Each stripe holds an equal
+        share of the maximum size, and evicts its least recently used entry
+        when full. On Python 2.6, which lacks OrderedDict, an arbitrary entry
+        is evicted instead.
+    '''
+
+    def __init__(self, maxsize=1024, stripes=16):
+        self.maxsize = maxsize
+        stripes = max(1, min(stripes, maxsize))
+        self._stripe_size = max(1, maxsize // stripes)
+        self._stripes = [(OrderedDict or dict)() for _ in range(stripes)]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._hits = [0] * stripes
+        self._misses = [0] * stripes
+        self._evictions = [0] * stripes
+
+    def get(self, key):
+        '''
+            Returns the value cached for the given key, or None.
+        '''
+        i = hash(key) % len(self._stripes)
+        stripe = self._stripes[i]
+        with self._locks[i]:
+            try:
+                value = stripe.pop(key)
+            except KeyError:
+                self._misses[i] += 1
+                return None
+            # Reinsert the value to mark it as the most recently used.
+            stripe[key] = value
+            self._hits[i] += 1
+            return value
+
+    def put(self, key, value):
+        i = hash(key) % len(self._stripes)
+        stripe = self._stripes[i]
+        with self._locks[i]:
+            stripe.pop(key, None)
+            stripe[key] = value
+            if len(stripe) > self._stripe_size:
+                if OrderedDict is None:
+                    stripe.popitem()
+                else:
+                    stripe.popitem(last=False)
+                self._evictions[i] += 1
+
+    def clear(self):
+        for i, stripe in enumerate(self._stripes):
+            with self._locks[i]:
+                stripe.clear()
+
+    def stats(self):
+        '''
+            Returns a dictionary of the cache's hit, miss and eviction
+            counters, along with its current and maximum size.
+        '''
+        return dict(hits=sum(self._hits),
+                    misses=sum(self._misses),
+                    evictions=sum(self._evictions),
+                    size=sum(len(stripe) for stripe in self._stripes),
+                    maxsize=self.maxsize)
 
 
 def re_fix(reg):
@@ -245,14 +804,54 @@ def try_match_any(inst, patterns):
 def try_match(request_origin, pattern):
     '''
         Safely attempts to match a pattern or string to a request origin.
+        Patterns are compiled, as for :py:func:`compile_pattern`, once.
     '''
-    try:
-        if isinstance(pattern, RegexObject):
-            return re.match(pattern, request_origin)
-        else:
-            return re.match(pattern, request_origin, flags=re.IGNORECASE)
-    except:
-        return request_origin == pattern
+    compiled = compile_pattern(pattern)
+    if isinstance(compiled, RegexObject):
+        return compiled.match(request_origin)
+    return request_origin == pattern
+
+
+def compile_pattern(pattern):
+    '''
+        Returns the compiled regular expression of a pattern given in the
+        options. Strings are compiled case-insensitively, and compiled
+        regular expressions are returned unchanged. Anything else, including
+        strings which are not valid regular expressions, is returned as is,
+        to be compared literally.
+
+        Compiled strings are memoized, so that matching many patterns does
+        not depend on the small cache of the `re` module.
+    '''
+    if isinstance(pattern, RegexObject) or not isinstance(pattern, string_types):
+        return pattern
+    compiled = _compiled_patterns.get(pattern)
+    if compiled is None:
+        try:
+            compiled = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            compiled = pattern
+        if len(_compiled_patterns) >= COMPILED_PATTERN_MEMO_SIZE:
+            _compiled_patterns.clear()
+        _compiled_patterns[pattern] = compiled
+    return compiled
+
+
+def compile_patterns(patterns):
+    '''
+        Splits a list of patterns into a tuple of the match methods of the
+        compiled regular expressions, and a frozenset of the strings which
+        are not valid regular expressions, as for :py:func:`compile_pattern`.
+    '''
+    regexes = []
+    literals = set()
+    for pattern in patterns:
+        compiled = compile_pattern(pattern)
+        if isinstance(compiled, RegexObject):
+            regexes.append(compiled.match)
+        elif isinstance(compiled, string_types):
+            literals.add(compiled)
+    return tuple(regexes), frozenset(literals)
 
 
 def get_cors_options(appInstance, *dicts):
@@ -261,8 +860,46 @@ def get_cors_options(appInstance, *dicts):
         the DEFAULT_OPTIONS, the app's configuration-specified options
         and any dictionaries passed. The last specified option wins.
     '''
+    return get_config_cors_options((appInstance or current_app).config,
+                                   *dicts)
+
+
+def get_config_resources(config, *dicts):
+    '''
+        Returns the list of (pattern, policy) pairs for the resources given
+        by the combined options, as for :py:func:`get_config_cors_options`,
+        where each resource's options are combined with, and take precedence
+        over, the others.
+    '''
+    options = get_config_cors_options(config, *dicts)
+    resources = parse_resources(options.get('resources'))
+    check_resource_patterns(resources, options)
+    return [
+        (pattern, compile_policy(get_config_cors_options(config, options, opts)))
+        for (pattern, opts) in resources
+    ]
+
+
+def check_resource_patterns(resources, options):
+    '''
+        Analyses the patterns of a list of parsed resources, as for
+        :py:func:`flask_cors.patterns.check_patterns`, according to the
+        `pattern_safety` of the top-level options. This is done once per
+        list of resources, rather than when each resource's options are
+        serialized, since they all carry the whole `resources` option.
+    '''
+    check_patterns([pattern for pattern, _ in resources], 'resources',
+                   options.get('pattern_safety'))
+
+
+def get_config_cors_options(config, *dicts):
+    '''
+        Compute CORS options by combining the DEFAULT_OPTIONS, the
+        CORS specific options in a configuration mapping and any dictionaries
+        passed. The last specified option wins.
+    '''
     options = DEFAULT_OPTIONS.copy()
-    options.update(get_app_kwarg_dict(appInstance))
+    options.update(get_config_kwarg_dict(config))
     if dicts:
         for d in dicts:
             options.update(d)
@@ -270,15 +907,38 @@ def get_cors_options(appInstance, *dicts):
     return serialize_options(options)
 
 
+def get_app_config_key(appInstance=None):
+    '''
+        Returns a cheap snapshot of the app's CORS specific
+        configuration values, suitable for detecting when previously computed
+        options have gone stale.
+
+        The values themselves are not copied, so the snapshot compares by
+        identity first, and replacing a config value (e.g.
+        `app.config['CORS_ORIGINS'] = [...]`) is detected without walking the
+        value. Mutating a configured list in place is not detected.
+    '''
+    config = (appInstance or current_app).config
+    return tuple(config.get(k) for k in CONFIG_OPTIONS)
+
+
 def get_app_kwarg_dict(appInstance=None):
     '''
         Returns the dictionary of CORS specific app configurations.
     '''
     app = (appInstance or current_app)
+    return get_config_kwarg_dict(app.config)
+
+
+def get_config_kwarg_dict(config):
+    '''
+        Returns the dictionary of CORS specific options in a configuration
+        mapping, such as a Flask app's config.
+    '''
     return dict(
-        (k.lower().replace('cors_', ''), app.config.get(k))
+        (k.lower().replace('cors_', ''), config.get(k))
         for k in CONFIG_OPTIONS
-        if app.config.get(k) is not None
+        if config.get(k) is not None
     )
 
 
@@ -318,6 +978,63 @@ def sanitize_regex_param(param):
     return [re_fix(x) for x in ensure_iterable(param)]
 
 
+def probably_regex(maybe_regex):
+    '''
+        Returns True if the given origin pattern is to be matched as a
+        regular expression, i.e. unless it is a well-formed origin, such as
+        'http://example.com', which :py:func:`canonicalize_origin` accepts.
+        Anything else, e.g. 'http://foo.com|http://bar.com' or
+        'http://.+.foo.com', is a regular expression, as it always was.
+    '''
+    if isinstance(maybe_regex, RegexObject):
+        return True
+    return canonicalize_origin(maybe_regex) is None
+
+
+def classify_origins(origins):
+    '''
+        Splits a sanitized list of origins into a set of canonical literal
+        origins, a list of compiled regular expressions, a flag indicating
+        whether the wildcard was given, a :py:class:`SubdomainTrie` of the
+        subdomain patterns, e.g. 'https://*.example.com', and an
+        :py:class:`OriginRangeTable` of the rules with CIDR blocks or port
+        ranges, e.g. 'http://10.0.0.0/8:8000-8099'.
+
+        Strings which are well-formed origins are literals, and any other
+        strings are regular expressions, which are matched
+        case-insensitively, or literals if they are not valid regular
+        expressions.
+    '''
+    literal = set()
+    regexes = []
+    wildcard = False
+    subdomains = SubdomainTrie()
+    ranges = []
+
+    for origin in origins:
+        if origin == r'.*':
+            wildcard = True
+        elif isinstance(origin, RegexObject):
+            regexes.append(origin)
+        elif not isinstance(origin, string_types):
+            continue
+        elif parse_subdomain_pattern(origin) is not None:
+            subdomains.add(origin)
+        elif parse_range_pattern(origin) is not None:
+            ranges.append(origin)
+        elif probably_regex(origin):
+            compiled = compile_pattern(origin)
+            if isinstance(compiled, RegexObject):
+                regexes.append(compiled)
+            else:
+                literal.add(origin.lower())
+        else:
+            literal.add(canonicalize_origin(origin))
+
+    return (frozenset(literal), regexes, wildcard, subdomains,
+            OriginRangeTable(ranges))
+
+
 def serialize_options(opts):
     '''
         A helper method to serialize and processes the options dictionary
@@ -329,9 +1046,15 @@ def serialize_options(opts):
     options['origins'] = sanitize_regex_param(options.get('origins'))
     options['allow_headers'] = sanitize_regex_param(options.get('allow_headers'))
 
+    # Refuse, or warn about, patterns which could take exponential time to
+    # match attacker controlled headers, before any request is evaluated.
+    safety = options.get('pattern_safety')
+    check_patterns(options['origins'], 'origins', safety)
+    check_patterns(options['allow_headers'], 'allow_headers', safety)
+
     # This is expressly forbidden by the spec. Raise a value error so people
     # don't get burned in production.
-    if r'.*' in options['origins'] and options['supports_credentials'] and options['send_wildcard']:
+    if r'.*' in options['origins'] and options.get('supports_credentials') and options.get('send_wildcard'):
         raise ValueError("Cannot use supports_credentials in conjunction with"
                          "an origin string of '*'. See: "
                          "http://www.w3.org/TR/cors/#resource-requests")
@@ -345,30 +1068,287 @@ def serialize_options(opts):
     return options
 
 
+class CorsPolicy(object):
+    '''
+        The immutable, compiled form of a set of serialized options, which is
+        what is evaluated on the request path.
+
+        Everything which can be derived from the options ahead of time, i.e.
+        the classified origins, the compiled allow_headers patterns, the set
+        of allowed methods and the values of the headers which do not depend
+        on the request, is computed once when the policy is compiled, so
+        evaluating a request only reads attributes. Policies should be created with
+        :py:func:`compile_policy`, which returns the same policy, along with
+        its caches, for equal options.
+    '''
+    __slots__ = ('options', 'origins', 'origins_literal', 'origins_regex',
+                 'origins_subdomain', 'origins_range', 'origin_files',
+                 'origin_stores',
+                 'origin_prefilter', 'is_wildcard', 'send_wildcard', 'needs_vary',
+                 'allow_headers', 'allow_headers_regex',
+                 'allow_headers_literal', 'allow_headers_wildcard', 'methods',
+                 'methods_header', 'expose_headers', 'credentials', 'max_age',
+                 'response_headers', 'preflight_headers', 'wildcard_headers',
+                 'automatic_options', 'short_circuit_preflight',
+                 'reject_disallowed_origins', 'reject_status', 'reject_body',
+                 'max_match_length', 'allow_headers_memo', 'decision_cache', '__weakref__')
+
+    def __init__(self, options):
+        (origins_literal, origins_regex, is_wildcard, origins_subdomain,
+         origins_range) = classify_origins(options['origins'])
+        origin_files = tuple(f for f in options['origins']
+                             if isinstance(f, OriginFile))
+        origin_stores = tuple(get_cached_store(store, options)
+                              for store in options['origins']
+                              if isinstance(store, OriginStore))
+        # A prefilter can only reject origins if it holds every origin
+        # which could be allowed.
+        if (options.get('origin_prefilter') and not is_wildcard and
+                not origins_regex and not len(origins_range) and
+                not origin_files and not origin_stores):
+            origin_prefilter = build_origin_prefilter(
+                origins_literal,
+                [o for o in options['origins']
+                 if isinstance(o, string_types) and parse_subdomain_pattern(o)])
+        else:
+            origin_prefilter = None
+        methods = options.get('methods')
+        max_age = options.get('max_age')
+        allow_headers_regex, allow_headers_literal = compile_patterns(
+            options['allow_headers'])
+
+        fields = dict(
+            options=options,
+            origins=options['origins'],
+            origins_literal=origins_literal,
+            origins_regex=tuple(origins_regex),
+            # Only kept if there are any patterns, to skip it otherwise
+            origins_subdomain=origins_subdomain if len(origins_subdomain) else None,
+            origins_range=origins_range if len(origins_range) else None,
+            origin_files=origin_files,
+            origin_stores=origin_stores,
+            origin_prefilter=origin_prefilter,
+            is_wildcard=is_wildcard,
+            send_wildcard=bool(options.get('send_wildcard')),
+            # The allowed origin only varies with the request if it is not
+            # always an asterisk, and more than one origin can be matched.
+            needs_vary=bool(options.get('vary_header') and
+                            (len(options['origins']) > 1 or origin_files or
+                             origin_stores or len(origins_subdomain) or
+                             len(origins_range)) and
+                            not (is_wildcard and options.get('send_wildcard'))),
+            allow_headers=tuple(options['allow_headers']),
+            allow_headers_regex=allow_headers_regex,
+            allow_headers_literal=allow_headers_literal,
+            allow_headers_wildcard=r'.*' in options['allow_headers'],
+            methods=frozenset(m.strip() for m in methods.split(',')) if methods else frozenset(),
+            methods_header=methods or None,
+            expose_headers=options.get('expose_headers') or None,
+            credentials='true' if options.get('supports_credentials') else None,
+            max_age=str(max_age) if max_age else None,
+            automatic_options=bool(options.get('automatic_options')),
+            short_circuit_preflight=bool(options.get('short_circuit_preflight')),
+            reject_disallowed_origins=bool(options.get('reject_disallowed_origins')),
+            reject_status=int(options.get('reject_status') or 403),
+            reject_body=options.get('reject_body') or '',
+            max_match_length=(int(options['max_match_length'])
+                              if options.get('max_match_length') else None),
+            allow_headers_memo=DecisionCache(ALLOW_HEADERS_MEMO_SIZE, stripes=4),
+            # The cached headers are only valid for the policy they were
+            # computed from, so each policy gets its own decision cache.
+            # Origin stores change over time, so their answers are only
+            # cached by their own cache, which expires them.
+            decision_cache=(DecisionCache(options['decision_cache_size'])
+                            if options.get('decision_cache_size')
+                            and not origin_stores else None),
+        )
+        # Render the headers which are the same for every request, which are
+        # set along with the allowed origin, once, ready to be appended to.
+        fields['response_headers'] = tuple(
+            (k, v) for k, v in [(ACL_EXPOSE_HEADERS, fields['expose_headers']),
+                                (ACL_CREDENTIALS, fields['credentials'])]
+            if v)
+        fields['preflight_headers'] = tuple(
+            (k, v) for k, v in [(ACL_MAX_AGE, fields['max_age']),
+                                (ACL_METHODS, fields['methods_header'])]
+            if v)
+        fields['wildcard_headers'] = (((ACL_ORIGIN, '*'),) +
+                                      fields['response_headers'])
+
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CorsPolicy objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CorsPolicy objects are immutable")
+
+    def __repr__(self):
+        return 'CorsPolicy(%r)' % (self.options,)
+
+
+def get_cached_store(store, options):
+    '''
+        Wraps an origin store in a :py:class:`CachedOriginStore` configured
+        by the origin_cache_* options, unless it is already cached.
+    '''
+    if isinstance(store, CachedOriginStore):
+        return store
+    return CachedOriginStore(
+        store,
+        ttl=options.get('origin_cache_ttl', 60),
+        negative_ttl=options.get('origin_negative_cache_ttl', 5),
+        maxsize=options.get('origin_cache_size', 1024),
+        stale_ttl=options.get('origin_cache_stale_ttl', 0),
+        timeout=options.get('origin_lookup_timeout'),
+        fail_open=bool(options.get('origin_lookup_fail_open')))
+
+
+# Options which do not affect the headers of a response, and so do not
+# distinguish one policy from another.
+NON_POLICY_OPTIONS = frozenset(['resources', 'intercept_exceptions', 'metrics'])
+
+# Compiled policies, by the frozen options they were compiled from.
+_policies = weakref.WeakValueDictionary()
+_policies_lock = threading.Lock()
+
+# The most recently used policies, by the same keys. Nothing else holds the
+# policies of options passed to the helpers as dictionaries, which would
+# otherwise be collected, and recompiled, after every call.
+_recent_policies = DecisionCache(POLICY_CACHE_SIZE, stripes=4)
+
+
+def compile_policy(options):
+    '''
+        Returns the :py:class:`CorsPolicy` for the given serialized options.
+
+        Policies are interned, so views and resources with equal options, e.g.
+        many views decorated with the same arguments, share a single policy,
+        and the most recently used are kept, so that options passed as
+        dictionaries are only compiled once. Options with unhashable values
+        are compiled into a policy of their own.
+    '''
+    key = get_policy_key(options)
+    if key is None:
+        return CorsPolicy(options)
+
+    policy = _recent_policies.get(key)
+    if policy is None:
+        with _policies_lock:
+            policy = _policies.get(key)
+            if policy is None:
+                policy = _policies[key] = CorsPolicy(options)
+        _recent_policies.put(key, policy)
+    return policy
+
+
+def as_policy(options):
+    '''
+        Returns the given policy, or compiles the given serialized options
+        into one, so that the functions which evaluate requests accept both.
+    '''
+    if isinstance(options, CorsPolicy):
+        return options
+    return compile_policy(options)
+
+
+def get_policy_key(options):
+    '''
+        Returns a hashable key identifying the policy of the given serialized
+        options, or None if any of the options cannot be hashed.
+    '''
+    key = tuple(sorted((k, freeze_option(v)) for k, v in options.items()
+                       if k not in NON_POLICY_OPTIONS))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def freeze_option(value):
+    if isinstance(value, (list, tuple)):
+        # Lists of hashable values, e.g. origins, are frozen in one step, as
+        # the key of long lists is computed for every dictionary of options.
+        frozen = tuple(value)
+        try:
+            hash(frozen)
+        except TypeError:
+            return tuple(freeze_option(v) for v in value)
+        return frozen
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    elif isinstance(value, dict):
+        return frozenset((k, freeze_option(v)) for k, v in value.items())
+    return value
+
+
+# The logger used outside of an application context.
+DEFAULT_LOGGER = logging.getLogger("flask.ext.cors")
+
+# Key under which each app's logger is cached in `app.extensions`.
+LOGGER_EXTENSION_KEY = 'cors_logger'
+
+
 def getLogger(app=None):
     '''
         Helper to get Flask-Cor's logger, attached to the current_app's logger
         if it exists.
+
+        The logger is resolved once per app and cached in the app's
+        extensions, as `logging.getLogger` takes a lock on every call.
     '''
-    # we are in the context of a request
-    if stack.top is not None:
-        return logging.getLogger("%s.cors" % current_app.logger_name)
-    # For use init method, when an app is known, but there is no context
-    elif app is not None:
-        return logging.getLogger("%s.cors" % app.logger_name)
-    else:
-        return logging.getLogger("flask.ext.cors")
+    # we are in the context of a request, or for use in the init method,
+    # when an app is known, but there is no context
+    top = stack.top
+    if top is not None:
+        app = top.app
+    elif app is None:
+        return DEFAULT_LOGGER
+
+    logger = app.extensions.get(LOGGER_EXTENSION_KEY)
+    if logger is None:
+        logger = logging.getLogger("%s.cors" % app.logger_name)
+        app.extensions[LOGGER_EXTENSION_KEY] = logger
+    return logger
 
 
 def debugLog(*args, **kwargs):
     '''
         Helper to log a message at the DEBUG level.
     '''
-    getLogger().debug(*args, **kwargs)
+    logger = getLogger()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(*args, **kwargs)
 
 
 def infoLog(*args, **kwargs):
     '''
         Helper to log a message at the INFO level.
     '''
-    getLogger().info(*args, **kwargs)
+    logger = getLogger()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(*args, **kwargs)
+
+
+class LazyString(object):
+    '''
+        Defers calling a function until its result is formatted, so that
+        expensive arguments to log messages cost nothing unless the message
+        is actually emitted.
+    '''
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
+
+    __repr__ = __str__
+
+
+def get_regexp_patterns(regexps):
+    return [get_regexp_pattern(regexp) for regexp in regexps]
@@ -8,9 +8,11 @@
     :copyright: (c) 2014 by Cory Dolphin.
     :license: MIT, see LICENSE for more details.
 """
+import weakref
 from functools import update_wrapper
 from flask import make_response, request, current_app
 from .core import *
+from .patterns import check_patterns
 
 
 def cross_origin(*args, **kwargs):
@@ -24,11 +26,27 @@ def cross_origin(*args, **kwargs):
 
 
     :param origins: The origin, or list of origins to allow requests from.
-        The origin(s) may be regular expressions, case-sensitive strings,
-        or else an asterisk
+        The origin(s) may be regular expressions, literal strings,
+        or else an asterisk. Strings which are well-formed origins, i.e.
+        'scheme://host[:port]', are compared to the request's origin exactly,
+        once both are canonicalized, i.e. lower-cased, with internationalized
+        hosts IDNA encoded and default ports omitted. Other strings are
+        regular expressions. Malformed request origins are only allowed by
+        '*', by being given literally, or by a regular expression. Patterns
+        of the form 'https://*.example.com', optionally with a port, allow
+        any subdomain of the host, over the given scheme and port, but not
+        the host itself. Origins with a CIDR block or a port range, e.g.
+        'http://10.0.0.0/8:8000-8099' or 'http://localhost:*', allow any
+        address in the block and any port in the range. Without a port,
+        they allow the scheme's default port. Large, static allow-lists may
+        be given as a :py:class:`flask_cors.origins.OriginFile`. Origins may
+        also be looked up dynamically, e.g. in a database, by giving an
+        instance of :py:class:`flask_cors.stores.OriginStore`,
+        whose answers are cached as configured by the `origin_cache_*`
+        options.
 
         Default : '*'
-    :type origins: list, string or regex
+    :type origins: list, string, regex, OriginFile or OriginStore
 
     :param methods: The method or list of methods which the allowed origins
         are allowed to access for non-simple requests.
@@ -91,10 +109,109 @@ def cross_origin(*args, **kwargs):
         Default : True
     :type automatic_options: bool
 
+    :param decision_cache_size: If set, the CORS headers computed for each
+        distinct combination of Origin, method, Access-Control-Request-*
+        headers and existing Vary header are kept in a thread-safe LRU cache
+        of at most this many entries, rather than being recomputed for every
+        request.
+
+        Default : None
+    :type decision_cache_size: int or None
+
+    :param reject_disallowed_origins: If True, requests with an Origin
+        header which is not allowed are answered with a response with the
+        `reject_status` and `reject_body`, before the view is called, rather
+        than running the view and omitting the CORS headers. Requests whose
+        Origin is the origin of the app itself are never rejected.
+
+        Default : False
+    :type reject_disallowed_origins: bool
+
+    :param reject_status: The status code of rejected requests.
+
+        Default : 403
+    :type reject_status: int
+
+    :param reject_body: The body of rejected requests.
+
+        Default : ''
+    :type reject_body: string
+
+    :param origin_cache_ttl: The number of seconds for which origins allowed
+        by an origin store are cached.
+
+        Default : 60
+    :type origin_cache_ttl: int
+
+    :param origin_negative_cache_ttl: The number of seconds for which origins
+        disallowed by an origin store are cached.
+
+        Default : 5
+    :type origin_negative_cache_ttl: int
+
+    :param origin_cache_size: The maximum number of origins cached per origin
+        store. The `decision_cache_size` option has no effect for policies
+        with origin stores.
+
+        Default : 1024
+    :type origin_cache_size: int
+
+    :param origin_cache_stale_ttl: The number of seconds for which expired
+        answers of an origin store continue to be served, while they are
+        refreshed in the background.
+
+        Default : 0
+    :type origin_cache_stale_ttl: int
+
+    :param origin_lookup_timeout: The number of seconds to wait for an
+        origin store to answer. Concurrent lookups of the same origin are
+        always coalesced into one.
+
+        Default : None, wait indefinitely
+    :type origin_lookup_timeout: float or None
+
+    :param origin_lookup_fail_open: If True, origins are allowed when an
+        origin store times out or fails, rather than disallowed.
+
+        Default : False
+    :type origin_lookup_fail_open: bool
+
+    :param origin_prefilter: If True, a Bloom filter of the literal origins
+        and subdomain patterns is built, which rejects most disallowed
+        origins with a few hash operations. It is only used if there are no
+        other kinds of origins, which it could not account for.
+
+        Default : False
+    :type origin_prefilter: bool
+
+    :param pattern_safety: What to do with regular expressions in the
+        `origins`, `allow_headers` and `resources` options which could take
+        exponential or quadratic time to match, such as nested quantifiers,
+        e.g. '(a+)+'. 'warn' logs a warning for each such pattern, 'error'
+        raises a ValueError when the options are set, and 'off' skips the
+        analysis.
+
+        Default : 'warn'
+    :type pattern_safety: string
+
+    :param max_match_length: If set, regular expressions are not evaluated
+        against origins, request headers or paths longer than this many
+        characters, which are then only matched by literal patterns.
+
+        Default : None
+    :type max_match_length: int or None
 
     '''
     _options = kwargs
 
+    # The decorator's own patterns are checked when it is applied, rather
+    # than when a request first compiles its policy, so that pattern_safety
+    # 'error' fails at import time instead of failing every request.
+    safety = _options.get('pattern_safety')
+    for kind in ('origins', 'allow_headers'):
+        if kind in _options:
+            check_patterns(sanitize_regex_param(_options[kind]), kind, safety)
+
     def decorator(f):
         debugLog("Enabling %s for cross_origin using options:%s", f, _options)
 
@@ -110,18 +227,39 @@ def cross_origin(*args, **kwargs):
             f.required_methods.add('OPTIONS')
             f.provide_automatic_options = False
 
+        # The compiled policy for each application this view is registered
+        # on, along with the snapshot of the app's configuration it was
+        # compiled from. Policies are only recompiled if the app's CORS_*
+        # configuration changes.
+        policies = weakref.WeakKeyDictionary()
+
+        def get_view_policy(app):
+            config_key = get_app_config_key(app)
+            cached = policies.get(app)
+            if cached is None or cached[0] != config_key:
+                cached = (config_key,
+                          compile_policy(get_cors_options(app, _options)))
+                policies[app] = cached
+            return cached[1]
+
         def wrapped_function(*args, **kwargs):
             # Handle setting of Flask-Cors parameters
-            options = get_cors_options(current_app, _options)
+            policy = get_view_policy(current_app._get_current_object())
+
+            if policy.reject_disallowed_origins:
+                resp = reject_disallowed_origin(policy)
+                if resp is not None:
+                    return resp
 
-            if options.get('automatic_options') and request.method == 'OPTIONS':
+            if policy.automatic_options and request.method == 'OPTIONS':
                 resp = current_app.make_default_options_response()
             else:
                 resp = make_response(f(*args, **kwargs))
 
-            set_cors_headers(resp, options)
+            set_cors_headers(resp, policy)
             setattr(resp, FLASK_CORS_EVALUATED, True)
             return resp
 
+        setattr(wrapped_function, FLASK_CORS_DECORATED, True)
         return update_wrapper(wrapped_function, f)
     return decorator
@@ -8,8 +8,10 @@
     :copyright: (c) 2014 by Cory Dolphin.
     :license: MIT, see LICENSE for more details.
 """
+import threading
 from flask import request
 from .core import *
+from .metrics import CorsMetrics, now_ns
 
 
 class CORS(object):
@@ -51,60 +53,212 @@ class CORS(object):
 
         :type resources: dict, iterable or string
 
+        :param short_circuit_preflight: If True, valid preflight requests
+        (OPTIONS requests with an allowed Origin and
+        Access-Control-Request-Method) to matching resources are answered
+        with an empty 204 response from a before_request handler, which runs
+        before any other before_request handlers and skips the view entirely.
+        Views using the :py:func:`cross_origin` decorator are not affected.
+        Note that, as the view is not dispatched to, such preflights are
+        answered even for paths which have no route.
+
+        Default : False
+
+        :type short_circuit_preflight: bool
+
+        :param reject_disallowed_origins: If True, requests to matching
+        resources with an Origin header which is not allowed are answered
+        with a response with the `reject_status` (default 403) and
+        `reject_body` (default empty) from a before_request handler, as for
+        `short_circuit_preflight`, without dispatching to the view. Requests
+        whose Origin is the origin of the app itself are never rejected.
+        Views using the :py:func:`cross_origin` decorator use the decorator's
+        options instead.
+
+        Default : False
+
+        :type reject_disallowed_origins: bool
+
+        :param metrics: If True, counts of the requests evaluated, by kind,
+        outcome and resource, and a histogram of the time spent evaluating
+        them, are collected and made available through :py:meth:`stats`.
+
+        Default : False
+
+        :type metrics: bool
+
     '''
 
     def __init__(self, app=None, **kwargs):
         self._options = kwargs
+        self._updates = {}
+        self._metrics = CorsMetrics()
+        # The kwargs given to init_app, and the current CorsState, by app
+        self._app_kwargs = {}
+        self._states = {}
+        self._update_lock = threading.Lock()
         if app is not None:
             self.init_app(app, **kwargs)
 
-    def init_app(self, app, **kwargs):
-        # The resources and options may be specified in the App Config, the CORS constructor
-        # or the kwargs to the call to init_app.
-        options = get_cors_options(app, self._options, kwargs)
+    def stats(self):
+        '''
+            Returns a snapshot of the metrics collected by the extension,
+            across all apps it was initialized with, if the metrics option is
+            enabled, along with the statistics of each resource's decision
+            cache and origin prefilter, including its false positive rate.
 
-        # Flatten our resources into a list of the form
-        # (pattern_or_regexp, dictionary_of_options)
-        resources = parse_resources(options.get('resources'))
+            The `counters` are: requests, no_origin, unmatched, simple,
+            preflight, allowed and rejected. The `resources` map each resource
+            pattern to the number of requests it matched.
+        '''
+        stats = self._metrics.snapshot()
+        stats['decision_cache'] = dict(
+            (get_regexp_pattern(pattern), policy.decision_cache.stats())
+            for state in list(self._states.values())
+            for pattern, policy in state.resources
+            if policy.decision_cache is not None
+        )
+        stats['origin_prefilter'] = dict(
+            (get_regexp_pattern(pattern), policy.origin_prefilter.stats())
+            for state in list(self._states.values())
+            for pattern, policy in state.resources
+            if policy.origin_prefilter is not None
+        )
+        return stats
 
-        # Compute the options for each resource by combining the options from
-        # the app's configuration, the constructor, the kwargs to init_app, and
-        # finally the options specified in the resources dictionary.
-        resources = [
-                     (pattern, get_cors_options(app, options, opts))
-                     for (pattern, opts) in resources
-                    ]
+    def update(self, **kwargs):
+        '''
+            Changes the options of the extension, for every app it was
+            initialized with, without restarting the app. The arguments are
+            identical to the constructor's, and are combined with, and take
+            precedence over, the options given to the constructor, init_app
+            and previous updates. The app's CORS_* configuration is read
+            again, so calling update without arguments applies any changes to
+            the configuration.
 
-        # Create a human readable form of these resources by converting the compiled
-        # regular expressions into strings.
-        resources_human = dict([(get_regexp_pattern(pattern), opts) for (pattern,opts) in resources])
-        getLogger(app).info("Configuring CORS with resources: %s", resources_human)
+            The new resources are compiled by the calling thread, and then
+            published with a single reference assignment, so requests never
+            wait for an update, and are evaluated against either the old or
+            the new resources, never a mix of both. The
+            `intercept_exceptions` option cannot be changed by an update.
+        '''
+        with self._update_lock:
+            updates = self._updates.copy()
+            updates.update(kwargs)
+            states = dict((app, self._compile(app, updates))
+                          for app in list(self._states))
+            self._updates = updates
+            for app, state in states.items():
+                self._states[app] = state
+
+    def init_app(self, app, **kwargs):
+        with self._update_lock:
+            self._app_kwargs[app] = kwargs
+            state = self._states[app] = self._compile(app, self._updates)
+        states = self._states
+
+        def evaluate(state, resp):
+            '''
+                Sets the CORS headers of the resource matching the request,
+                if any, and returns the match.
+            '''
+            matched = state.router.match_rule(request.url_rule, request.path)
+            if matched is not None:
+                res_regex, res_policy = matched
+                debugLog("Request to '%s' matches CORS resource '%s'. Using options: %s",
+                      request.path, get_regexp_pattern(res_regex), res_policy.options)
+                set_cors_headers(resp, res_policy)
+            else:
+                debugLog('No CORS rule matches')
+            return matched
 
         def cors_after_request(resp):
             '''
-                The actual after-request handler, retains references to the
-                the options, and definitions of resources through a closure.
+                The actual after-request handler, which evaluates the
+                current state of the app's resources.
             '''
             # If CORS headers are set in a view decorator, pass
             if resp.headers.get(ACL_ORIGIN):
                 debugLog('CORS have been already evaluated, skipping')
                 return resp
 
-            for res_regex, res_options in resources:
-                if try_match(request.path, res_regex):
-                    debugLog("Request to '%s' matches CORS resource '%s'. Using options: %s",
-                          request.path, get_regexp_pattern(res_regex), res_options)
-                    set_cors_headers(resp, res_options)
-                    break
+            state = states[app]
+            if state.metrics is None or hasattr(resp, FLASK_CORS_RECORDED):
+                evaluate(state, resp)
             else:
-                debugLog('No CORS rule matches')
+                start = now_ns()
+                matched = evaluate(state, resp)
+                record_metrics(state.metrics, resp, matched, now_ns() - start)
+                setattr(resp, FLASK_CORS_RECORDED, True)
             return resp
 
         app.after_request(cors_after_request)
 
+        def cors_before_request():
+            '''
+                Rejects requests from disallowed origins to resources with the
+                reject_disallowed_origins option, and answers valid preflight
+                requests to resources with the short_circuit_preflight option
+                directly, before any other before_request handlers and without
+                dispatching to the view.
+            '''
+            state = states[app]
+            if not (state.short_circuits or state.rejects):
+                return None
+
+            if not request.headers.get('Origin'):
+                return None
+
+            preflight = (request.method == 'OPTIONS'
+                         and request.headers.get(ACL_REQUEST_METHOD))
+            if not (state.rejects or preflight):
+                return None
+
+            # Views using the decorator have their own options
+            if request.url_rule is not None:
+                view = app.view_functions.get(request.url_rule.endpoint)
+                if getattr(view, FLASK_CORS_DECORATED, False):
+                    return None
+
+            matched = state.router.match_rule(request.url_rule, request.path)
+            if matched is None:
+                return None
+            policy = matched[1]
+
+            # The after_request handler records the metrics of rejections
+            if policy.reject_disallowed_origins:
+                resp = reject_disallowed_origin(policy)
+                if resp is not None:
+                    return resp
+
+            if not (preflight and policy.short_circuit_preflight):
+                return None
+
+            headers = get_cors_header_items(policy, request.headers,
+                                            request.method, {})
+            # Access-Control-Allow-Methods is only set when both the origin
+            # and the requested method are allowed. Otherwise, fall back
+            # to the usual handling.
+            if not any(k == ACL_METHODS for k, _ in headers):
+                return None
+
+            debugLog("Short circuiting preflight to '%s'", request.path)
+            resp = app.response_class(status=204)
+            extend_headers(resp.headers, headers)
+
+            if state.metrics is not None:
+                record_metrics(state.metrics, resp, matched, None)
+            return resp
+
+        # Registered first, so that no other before_request handler runs.
+        # It is registered even if no resource needs it yet, as an update
+        # may add one.
+        app.before_request_funcs.setdefault(None, []).insert(
+            0, cors_before_request)
+
         # Wrap exception handlers with cross_origin
         # These error handlers will still respect the behavior of the route
-        if options.get('intercept_exceptions', True):
+        if state.options.get('intercept_exceptions', True):
             def _after_request_decorator(f):
                 def wrapped_function(*args, **kwargs):
                     return cors_after_request(app.make_response(f(*args, **kwargs)))
@@ -114,3 +268,80 @@ class CORS(object):
                 app.handle_exception)
             app.handle_user_exception = _after_request_decorator(
                 app.handle_user_exception)
+
+    def _compile(self, app, updates):
+        '''
+            Compiles the CorsState of the given app, from the options given
+            to the constructor, init_app and the given updates.
+        '''
+        # The resources and options may be specified in the App Config, the CORS constructor
+        # or the kwargs to the call to init_app.
+        options = get_cors_options(app, self._options, self._app_kwargs[app],
+                                   updates)
+
+        # Flatten our resources into a list of the form
+        # (pattern_or_regexp, dictionary_of_options)
+        resources = parse_resources(options.get('resources'))
+        check_resource_patterns(resources, options)
+
+        # Compute the options for each resource by combining the options from
+        # the app's configuration, the constructor, the kwargs to init_app, and
+        # finally the options specified in the resources dictionary, and
+        # compile them into the policy evaluated for each request.
+        resources = [
+                     (pattern, compile_policy(get_cors_options(app, options, opts)))
+                     for (pattern, opts) in resources
+                    ]
+
+        # Create a human readable form of these resources by converting the compiled
+        # regular expressions into strings.
+        resources_human = dict([(get_regexp_pattern(pattern), policy.options) for (pattern,policy) in resources])
+        getLogger(app).info("Configuring CORS with resources: %s", resources_human)
+
+        metrics = self._metrics if options.get('metrics') else None
+        return CorsState(options, resources, metrics)
+
+
+class CorsState(object):
+    '''
+        The compiled resources of the extension for an app. A state is never
+        modified once compiled: updates compile a new state and replace the
+        reference to the old one, so the request path reads it without
+        locking.
+    '''
+    __slots__ = ('options', 'resources', 'router', 'metrics',
+                 'short_circuits', 'rejects')
+
+    def __init__(self, options, resources, metrics=None):
+        self.options = options
+        self.resources = resources
+        # Compile the resources into a single matching engine, which
+        # preserves the precedence of their ordering.
+        self.router = ResourceRouter(resources,
+                                     max_length=options.get('max_match_length'))
+        self.metrics = metrics
+        self.short_circuits = any(policy.short_circuit_preflight
+                                  for _, policy in resources)
+        self.rejects = any(policy.reject_disallowed_origins
+                           for _, policy in resources)
+
+
+def record_metrics(metrics, resp, matched, elapsed_ns):
+    '''
+        Records the kind and outcome of the current request's evaluation.
+    '''
+    if not request.headers.get('Origin'):
+        counters = ('requests', 'no_origin')
+    elif matched is None:
+        counters = ('requests', 'unmatched')
+    else:
+        if (request.method == 'OPTIONS'
+                and request.headers.get(ACL_REQUEST_METHOD)):
+            kind = 'preflight'
+        else:
+            kind = 'simple'
+        outcome = 'allowed' if ACL_ORIGIN in resp.headers else 'rejected'
+        counters = ('requests', kind, outcome)
+
+    resource = get_regexp_pattern(matched[0]) if matched is not None else None
+    metrics.record(counters, resource, elapsed_ns)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+    flask_cors
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import time
+import threading
+from six.moves._thread import get_ident
+
+# Use the highest resolution, monotonic clock available.
+if hasattr(time, 'perf_counter_ns'):
+    now_ns = time.perf_counter_ns
+elif hasattr(time, 'perf_counter'):
+    def now_ns():
+        return int(time.perf_counter() * 1e9)
+else:
+    def now_ns():
+        return int(time.time() * 1e9)
+
+# Latencies are counted in buckets whose upper bounds are powers of two
+# nanoseconds, up to 2 ** 40ns (~18 minutes).
+HISTOGRAM_BUCKETS = 41
+
+
+class MetricsAccumulator(object):
+    '''
+        The counters recorded by a single thread.
+    '''
+    __slots__ = ('counters', 'resources', 'histogram', 'total_ns')
+
+    def __init__(self):
+        self.counters = {}
+        self.resources = {}
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.total_ns = 0
+
+
+class CorsMetrics(object):
+    '''
+        Collects counts of the requests evaluated by the CORS extension and a
+        histogram of the time spent evaluating them.
+
+        Each thread records into its own accumulator, so recording never
+        takes a lock, and :py:meth:`snapshot` sums the accumulators of all
+        threads. Accumulators are kept by thread identifier, so a thread which
+        reuses the identifier of a finished one continues its counts, rather
+        than the number of accumulators growing with every new thread.
+    '''
+
+    def __init__(self):
+        self._local = threading.local()
+        self._accumulators = {}
+        self._lock = threading.Lock()
+
+    def _accumulator(self):
+        try:
+            return self._local.accumulator
+        except AttributeError:
+            with self._lock:
+                accumulator = self._accumulators.setdefault(
+                    get_ident(), MetricsAccumulator())
+            self._local.accumulator = accumulator
+            return accumulator
+
+    def record(self, counters, resource=None, elapsed_ns=None):
+        '''
+            Increments each of the named counters, the match count of the
+            given resource pattern, if any, and the latency histogram, if
+            an elapsed time is given.
+        '''
+        accumulator = self._accumulator()
+
+        for name in counters:
+            accumulator.counters[name] = accumulator.counters.get(name, 0) + 1
+
+        if resource is not None:
+            accumulator.resources[resource] = (
+                accumulator.resources.get(resource, 0) + 1)
+
+        if elapsed_ns is not None:
+            bucket = min(max(elapsed_ns, 0).bit_length(),
+                         HISTOGRAM_BUCKETS - 1)
+            accumulator.histogram[bucket] += 1
+            accumulator.total_ns += elapsed_ns
+
+    def snapshot(self):
+        '''
+            Returns a dictionary of the counters, per-resource match counts
+            and latency histogram summed across all threads. Counts recorded
+            while the snapshot is taken may or may not be included.
+
+            The histogram is a list of (bound_ns, count) pairs, counting the
+            latencies below each bound, and at least half of it.
+        '''
+        counters = {}
+        resources = {}
+        histogram = [0] * HISTOGRAM_BUCKETS
+        total_ns = 0
+
+        with self._lock:
+            accumulators = list(self._accumulators.values())
+
+        for accumulator in accumulators:
+            for name, count in list(accumulator.counters.items()):
+                counters[name] = counters.get(name, 0) + count
+            for name, count in list(accumulator.resources.items()):
+                resources[name] = resources.get(name, 0) + count
+            for i, count in enumerate(accumulator.histogram):
+                histogram[i] += count
+            total_ns += accumulator.total_ns
+
+        count = sum(histogram)
+        return dict(counters=counters,
+                    resources=resources,
+                    latency=dict(
+                        count=count,
+                        total_ns=total_ns,
+                        mean_ns=total_ns // count if count else None,
+                        histogram=[(2 ** i, n)
+                                   for i, n in enumerate(histogram) if n]))
+
+    def reset(self):
+        with self._lock:
+            self._accumulators.clear()
+            self._local = threading.local()
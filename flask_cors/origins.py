@@ -0,0 +1,591 @@
+# -*- coding: utf-8 -*-
+"""
+    flask_cors
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import os
+import re
+import math
+import mmap
+import socket
+import struct
+from bisect import bisect_right
+
+# Origin patterns which allow any subdomain of a host, over a given scheme
+# and, optionally, port, e.g. 'https://*.example.com' or
+# 'http://*.example.com:8080'.
+SUBDOMAIN_PATTERN = re.compile(
+    r'^([a-z][a-z0-9+.-]*)://\*\.((?:[a-z0-9-]+\.)*[a-z0-9-]+)(?::(\d+))?$',
+    re.IGNORECASE)
+
+# The layout of origin files, written by write_origin_file: a header with a
+# magic number and the number of origins, an index of the file offset of each
+# origin, and the origins, sorted, each prefixed with its length.
+ORIGIN_FILE_MAGIC = b'FLCORS01'
+ORIGIN_FILE_HEADER = struct.Struct('<8sQ')
+ORIGIN_FILE_OFFSET = struct.Struct('<Q')
+ORIGIN_FILE_LENGTH = struct.Struct('<H')
+
+# The ports which are omitted from the serialization of origins.
+DEFAULT_PORTS = {'http': '80', 'https': '443', 'ws': '80', 'wss': '443'}
+
+# Valid URL schemes and hosts, once lower-cased and IDNA encoded.
+SCHEME = re.compile(r'^[a-z][a-z0-9+.-]*$')
+HOST = re.compile(r'^(?:[a-z0-9_-]+(?:\.[a-z0-9_-]+)*|\[[0-9a-f:.]+\])$')
+
+# Origin rules which allow a range of IP addresses, given in CIDR notation,
+# and/or a range of ports, e.g. 'http://10.0.0.0/8:8000-8099',
+# 'http://localhost:*' or 'http://[fd00::]/8'.
+RANGE_PATTERN = re.compile(
+    r'^([a-z][a-z0-9+.-]*)://(\[[0-9a-f:.]+\]|[a-z0-9_.-]+)'
+    r'(?:/(\d{1,3}))?(?::(\*|\d+-\d+|\d+))?$',
+    re.IGNORECASE)
+IPV4_ADDRESS = re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$')
+
+# The number of canonical forms of origins which are memoized.
+CANONICAL_ORIGIN_MEMO_SIZE = 4096
+
+# The target false positive rate of origin prefilters.
+PREFILTER_ERROR_RATE = 0.01
+
+
+# Canonical forms of origins, by the raw origin.
+_canonical_origins = {}
+
+
+def canonicalize_origin(origin):
+    '''
+        Returns the canonical form of an origin, as browsers serialize it:
+        with the scheme and host lower-cased, an internationalized host
+        encoded with IDNA, and the port omitted if it is the default port of
+        the scheme. Returns None if the origin is malformed, e.g. has no
+        scheme, or has a path. The opaque origin 'null' is returned as is.
+
+        Results are memoized, as browsers send the same few origins over and
+        over.
+    '''
+    canonical = _canonical_origins.get(origin, False)
+    if canonical is not False:
+        return canonical
+
+    canonical = _canonicalize_origin(origin)
+    if len(_canonical_origins) >= CANONICAL_ORIGIN_MEMO_SIZE:
+        _canonical_origins.clear()
+    _canonical_origins[origin] = canonical
+    return canonical
+
+
+def _canonicalize_origin(origin):
+    if origin == 'null':
+        return origin
+
+    scheme, sep, rest = origin.partition('://')
+    scheme = scheme.lower()
+    if not sep or not SCHEME.match(scheme):
+        return None
+
+    host, sep, port = rest.rpartition(':')
+    if not sep or ']' in port:
+        # No port, or the last colon is part of an IPv6 address
+        host, port = rest, None
+    elif not port.isdigit() or int(port) > 65535:
+        return None
+    else:
+        port = str(int(port))
+        if port == DEFAULT_PORTS.get(scheme):
+            port = None
+
+    try:
+        host = host.encode('idna').decode('ascii').lower()
+    except (UnicodeError, ValueError):
+        return None
+    if not HOST.match(host):
+        return None
+
+    canonical = '%s://%s' % (scheme, host)
+    return canonical if port is None else '%s:%s' % (canonical, port)
+
+
+def parse_subdomain_pattern(origin):
+    '''
+        Returns the (scheme, host, port) of a subdomain origin pattern, such
+        as 'https://*.example.com', lower-cased, or None if the origin is not
+        one. The host is IDNA encoded, as for :py:func:`canonicalize_origin`,
+        e.g. 'https://*.bücher.de' matches subdomains of 'xn--bcher-kva.de'.
+        The port is None if the pattern does not give one, or gives the
+        default port of the scheme.
+    '''
+    prefix, sep, rest = origin.partition('://*.')
+    if not sep:
+        return None
+    host, colon, port = rest.partition(':')
+    try:
+        host = host.encode('idna').decode('ascii')
+    except (UnicodeError, ValueError):
+        return None
+
+    match = SUBDOMAIN_PATTERN.match(prefix + sep + host + colon + port)
+    if match is None:
+        return None
+    scheme, host, port = match.groups()
+    scheme = scheme.lower()
+    if port is not None:
+        port = str(int(port))
+        if port == DEFAULT_PORTS.get(scheme):
+            port = None
+    return scheme, host.lower(), port
+
+
+def split_origin(origin):
+    '''
+        Splits an origin into its (scheme, host, port), where the port is
+        None if the origin does not give one, or returns None if the origin
+        is not of that form.
+    '''
+    scheme, sep, rest = origin.partition('://')
+    if not sep or not rest:
+        return None
+    host, sep, port = rest.rpartition(':')
+    if not sep or ']' in port:
+        # No port, or the last colon is part of an IPv6 address
+        return scheme, rest, None
+    return scheme, host, port
+
+
+def subdomain_key(scheme, host, port):
+    '''
+        Returns the normalised form of the subdomain pattern of the given
+        scheme, host and port, e.g. 'https://*.example.com'.
+    '''
+    key = '%s://*.%s' % (scheme, host)
+    return key if port is None else '%s:%s' % (key, port)
+
+
+def get_origin_keys(origin):
+    '''
+        Returns the keys under which a canonical origin may have been
+        allowed: the origin itself, and the normalised subdomain pattern of
+        each of its parent domains.
+    '''
+    keys = [origin]
+    parts = split_origin(origin)
+    if parts is not None:
+        scheme, host, port = parts
+        labels = host.split('.')
+        for i in range(1, len(labels)):
+            keys.append(subdomain_key(scheme, '.'.join(labels[i:]), port))
+    return keys
+
+
+class SubdomainTrie(object):
+    '''
+        Matches origins against subdomain origin patterns, e.g.
+        'https://*.example.com', with a trie keyed on the labels of the
+        patterns' hosts in reverse, i.e. 'com', then 'example'. Matching an
+        origin takes one dictionary lookup per label of its host, however
+        many patterns there are.
+
+        A pattern matches every subdomain of its host, at any depth, but not
+        the host itself, and only with the pattern's scheme and port.
+    '''
+    __slots__ = ('root', 'size')
+
+    def __init__(self, patterns=()):
+        # Each node maps a label to its child node, and None to the set of
+        # (scheme, port) pairs of the patterns ending at the node.
+        self.root = {}
+        self.size = 0
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern):
+        '''
+            Adds a subdomain pattern, which must be accepted by
+            :py:func:`parse_subdomain_pattern`.
+        '''
+        scheme, host, port = parse_subdomain_pattern(pattern)
+        node = self.root
+        for label in reversed(host.split('.')):
+            node = node.setdefault(label, {})
+        node.setdefault(None, set()).add((scheme, port))
+        self.size += 1
+
+    def match(self, origin):
+        '''
+            Returns True if the given canonical origin is a subdomain
+            allowed by any of the patterns.
+        '''
+        parts = split_origin(origin)
+        if parts is None:
+            return False
+        scheme, host, port = parts
+        labels = host.split('.')
+        if not all(labels):
+            return False
+
+        key = (scheme, port)
+        node = self.root
+        # The first label is never consumed, as a pattern only matches
+        # strict subdomains of its host.
+        for i in range(len(labels) - 1, 0, -1):
+            node = node.get(labels[i])
+            if node is None:
+                return False
+            terminal = node.get(None)
+            if terminal is not None and key in terminal:
+                return True
+        return False
+
+    def __len__(self):
+        return self.size
+
+
+class OriginFile(object):
+    '''
+        A large, static set of allowed origins, e.g. millions of partner
+        origins, read from a file written by :py:func:`write_origin_file`,
+        which may be given in the `origins` option.
+
+        The file is memory-mapped rather than loaded, so every worker process
+        shares the same pages of the operating system's page cache, and
+        opening it takes constant time. Origins are found with a binary
+        search of the file's index.
+
+        :param path: the path of the origin file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < ORIGIN_FILE_HEADER.size:
+            raise ValueError("%s is not an origin file" % path)
+        magic, self.count = ORIGIN_FILE_HEADER.unpack_from(self._mmap, 0)
+        if magic != ORIGIN_FILE_MAGIC:
+            raise ValueError("%s is not an origin file" % path)
+
+    def __contains__(self, origin):
+        '''
+            Returns True if the given canonical origin is in the file.
+        '''
+        key = origin.encode('utf-8')
+        data = self._mmap
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, = ORIGIN_FILE_OFFSET.unpack_from(
+                data, ORIGIN_FILE_HEADER.size + ORIGIN_FILE_OFFSET.size * mid)
+            length, = ORIGIN_FILE_LENGTH.unpack_from(data, offset)
+            start = offset + ORIGIN_FILE_LENGTH.size
+            record = data[start:start + length]
+            if record < key:
+                lo = mid + 1
+            elif record > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._mmap.close()
+
+    def __repr__(self):
+        return '<%s %r (%d origins)>' % (self.__class__.__name__, self.path,
+                                         self.count)
+
+
+def write_origin_file(path, origins):
+    '''
+        Writes the given origins to an origin file, to be opened with
+        :py:class:`OriginFile`. Origins are canonicalized, as for
+        :py:func:`canonicalize_origin`, and deduplicated. The
+        file is written to a temporary file which is then renamed, so that
+        processes which have the previous file open are not affected.
+    '''
+    records = sorted(set(
+        (canonicalize_origin(origin) or origin.lower()).encode('utf-8')
+        for origin in origins))
+
+    offset = ORIGIN_FILE_HEADER.size + ORIGIN_FILE_OFFSET.size * len(records)
+    offsets = []
+    for record in records:
+        offsets.append(offset)
+        offset += ORIGIN_FILE_LENGTH.size + len(record)
+
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(ORIGIN_FILE_HEADER.pack(ORIGIN_FILE_MAGIC, len(records)))
+        for offset in offsets:
+            f.write(ORIGIN_FILE_OFFSET.pack(offset))
+        for record in records:
+            f.write(ORIGIN_FILE_LENGTH.pack(len(record)))
+            f.write(record)
+    os.rename(tmp_path, path)
+
+
+class BloomFilter(object):
+    '''
+        A compact, probabilistic set of strings, which answers whether a
+        string is definitely not in the set, or may be in it, with a few
+        hash operations, whatever its size.
+
+        :param capacity: the number of strings the filter is sized for.
+
+        :param error_rate: the rate of false positives, i.e. strings which
+            are not in the set, but may be, at capacity.
+    '''
+
+    def __init__(self, capacity, error_rate=PREFILTER_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.bits = max(int(math.ceil(-capacity * math.log(error_rate) /
+                                      math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.bits / float(capacity) *
+                                    math.log(2))), 1)
+        self.size = 0
+        self._array = bytearray((self.bits + 7) // 8)
+        # Counters of the checks made, those rejected by the filter, and
+        # those which passed the filter but were not in the set. They are
+        # not synchronized, so may undercount under concurrency.
+        self.checks = 0
+        self.rejections = 0
+        self.false_positives = 0
+
+    def _indexes(self, key):
+        # Double hashing derives every index from the halves of one hash.
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for i in self._indexes(key):
+            self._array[i >> 3] |= 1 << (i & 7)
+        self.size += 1
+
+    def __contains__(self, key):
+        array = self._array
+        for i in self._indexes(key):
+            if not array[i >> 3] & (1 << (i & 7)):
+                return False
+        return True
+
+    def check(self, keys):
+        '''
+            Returns False if none of the given keys are in the set, and
+            counts the check.
+        '''
+        self.checks += 1
+        for key in keys:
+            if key in self:
+                return True
+        self.rejections += 1
+        return False
+
+    def stats(self):
+        '''
+            Returns a dictionary of the filter's size and counters, along
+            with its observed false positive rate, i.e. the share of the
+            checked strings not in the set which passed the filter, and the
+            expected rate, given the number of strings added.
+        '''
+        negatives = self.rejections + self.false_positives
+        false_positive_rate = (float(self.false_positives) / negatives
+                               if negatives else None)
+        return dict(bits=self.bits,
+                    hashes=self.hashes,
+                    size=self.size,
+                    checks=self.checks,
+                    rejections=self.rejections,
+                    false_positives=self.false_positives,
+                    false_positive_rate=false_positive_rate,
+                    expected_false_positive_rate=(
+                        1 - math.exp(-self.hashes * self.size /
+                                     float(self.bits))) ** self.hashes)
+
+
+def build_origin_prefilter(literals, subdomain_patterns):
+    '''
+        Returns a :py:class:`BloomFilter` of the given canonical literal
+        origins and subdomain patterns, which are normalised as for
+        :py:func:`get_origin_keys`.
+    '''
+    keys = set(literals)
+    for pattern in subdomain_patterns:
+        keys.add(subdomain_key(*parse_subdomain_pattern(pattern)))
+
+    prefilter = BloomFilter(len(keys))
+    for key in keys:
+        prefilter.add(key)
+    return prefilter
+
+
+def parse_address(host):
+    '''
+        Returns the (bits, integer) of an IPv4 address, e.g. '10.0.0.1', or
+        an IPv6 address in brackets, e.g. '[::1]', where bits is the size of
+        the address, or None if the host is not an IP address.
+    '''
+    try:
+        if IPV4_ADDRESS.match(host):
+            return 32, struct.unpack('!I', socket.inet_aton(host))[0]
+        if host.startswith('[') and host.endswith(']'):
+            high, low = struct.unpack(
+                '!QQ', socket.inet_pton(socket.AF_INET6, host[1:-1]))
+            return 128, (high << 64) | low
+    except (socket.error, ValueError, AttributeError):
+        # AttributeError: inet_pton is not available on this platform
+        pass
+    return None
+
+
+def parse_range_pattern(origin):
+    '''
+        Returns the (scheme, host, addresses, ports) of an origin rule with
+        a CIDR block and/or a port range, such as
+        'http://10.0.0.0/8:8000-8099' or 'http://localhost:*', or None if
+        the origin is not one. The addresses are the (bits, first, last)
+        of the block, or None for a host name, and the ports are the
+        (first, last) of the range, where a rule without a port allows the
+        default port of its scheme.
+
+        Raises ValueError for rules with an invalid block or range.
+    '''
+    match = RANGE_PATTERN.match(origin)
+    if match is None:
+        return None
+    scheme, host, prefix, ports = match.groups()
+    single_port = ports is None or (ports != '*' and '-' not in ports)
+    if prefix is None and single_port:
+        # A single origin, which is matched literally
+        return None
+
+    scheme = scheme.lower()
+    host = host.lower()
+    address = parse_address(host)
+    if address is None:
+        if prefix is not None:
+            raise ValueError("Invalid CIDR block in origin %r" % origin)
+        addresses = None
+    else:
+        bits, value = address
+        prefix = bits if prefix is None else int(prefix)
+        if prefix > bits:
+            raise ValueError("Invalid CIDR block in origin %r" % origin)
+        size = 1 << (bits - prefix)
+        first = value & ~(size - 1)
+        addresses = (bits, first, first + size - 1)
+
+    if ports is None:
+        default = DEFAULT_PORTS.get(scheme)
+        if default is None:
+            raise ValueError("No port given in origin %r" % origin)
+        ports = (int(default), int(default))
+    elif ports == '*':
+        ports = (1, 65535)
+    else:
+        first, _, last = ports.partition('-')
+        ports = (int(first), int(last or first))
+        if ports[0] > ports[1] or ports[1] > 65535:
+            raise ValueError("Invalid port range in origin %r" % origin)
+
+    return scheme, host, addresses, ports
+
+
+def merge_intervals(intervals):
+    '''
+        Merges the given (first, last) intervals of integers into a pair of
+        sorted lists of the first and last integers of disjoint intervals,
+        which may be searched with :py:func:`in_intervals`.
+    '''
+    firsts, lasts = [], []
+    for first, last in sorted(intervals):
+        if lasts and first <= lasts[-1] + 1:
+            lasts[-1] = max(lasts[-1], last)
+        else:
+            firsts.append(first)
+            lasts.append(last)
+    return firsts, lasts
+
+
+def in_intervals(intervals, value):
+    firsts, lasts = intervals
+    i = bisect_right(firsts, value) - 1
+    return i >= 0 and value <= lasts[i]
+
+
+class OriginRangeTable(object):
+    '''
+        Matches origins against rules with CIDR blocks and port ranges, as
+        parsed by :py:func:`parse_range_pattern`.
+
+        The rules of each scheme and address family are compiled into a
+        sorted table of the boundaries of the blocks, which divide the
+        addresses into intervals, each with the merged port ranges allowed
+        for it. Matching an origin with an IP address is a binary search
+        for its interval, then for its port, however many rules there are.
+        Rules with host names map the host to its merged port ranges.
+    '''
+    __slots__ = ('tables', 'hosts', 'size')
+
+    def __init__(self, patterns=()):
+        rules = {}
+        hosts = {}
+        self.size = 0
+        for pattern in patterns:
+            scheme, host, addresses, ports = parse_range_pattern(pattern)
+            if addresses is None:
+                hosts.setdefault((scheme, host), []).append(ports)
+            else:
+                bits, first, last = addresses
+                rules.setdefault((scheme, bits), []).append(
+                    (first, last, ports))
+            self.size += 1
+
+        self.hosts = dict((key, merge_intervals(ports))
+                          for key, ports in hosts.items())
+        self.tables = {}
+        for key, key_rules in rules.items():
+            boundaries = sorted(set(
+                [first for first, _, _ in key_rules] +
+                [last + 1 for _, last, _ in key_rules]))
+            intervals = []
+            for boundary in boundaries:
+                ports = [p for first, last, p in key_rules
+                         if first <= boundary <= last]
+                intervals.append(merge_intervals(ports) if ports else None)
+            self.tables[key] = (boundaries, intervals)
+
+    def match(self, origin):
+        '''
+            Returns True if the given canonical origin is allowed by any of
+            the rules.
+        '''
+        parts = split_origin(origin)
+        if parts is None:
+            return False
+        scheme, host, port = parts
+        port = int(port if port is not None else DEFAULT_PORTS.get(scheme, 0))
+
+        address = parse_address(host)
+        if address is None:
+            ports = self.hosts.get((scheme, host))
+        else:
+            table = self.tables.get((scheme, address[0]))
+            if table is None:
+                return False
+            boundaries, intervals = table
+            i = bisect_right(boundaries, address[1]) - 1
+            ports = intervals[i] if i >= 0 else None
+        return ports is not None and in_intervals(ports, port)
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+    flask_cors
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import string
+import logging
+from six import string_types, unichr
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+LOG = logging.getLogger("flask.ext.cors")
+
+PATTERN_SAFETY_LEVELS = ('warn', 'error', 'off')
+
+MAXREPEAT = sre_constants.MAXREPEAT
+REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+# Possessive repeats and atomic groups never backtrack (Python 3.11+).
+POSSESSIVE_REPEAT = getattr(sre_constants, 'POSSESSIVE_REPEAT', None)
+ATOMIC_GROUP = getattr(sre_constants, 'ATOMIC_GROUP', None)
+ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT,
+              sre_constants.ASSERT_NOT)
+
+# The characters of the categories common in patterns, e.g. \d, for
+# deciding whether two alternatives can start with the same character.
+CATEGORY_CHARS = {
+    sre_constants.CATEGORY_DIGIT: frozenset(string.digits),
+    sre_constants.CATEGORY_WORD: frozenset(string.ascii_lowercase +
+                                           string.digits + '_'),
+    sre_constants.CATEGORY_SPACE: frozenset(' \t\n\r\f\v'),
+}
+
+# Character ranges wider than this are treated as matching any character.
+MAX_RANGE_SIZE = 256
+
+# Sets of characters are (negated, characters) pairs.
+NOTHING = (False, frozenset())
+ANYTHING = (True, frozenset())
+
+# The problems found in each pattern analysed, by pattern and flags.
+_pattern_problems = {}
+
+# The patterns which have already been warned about.
+_reported = set()
+
+
+def analyze_pattern(pattern):
+    '''
+        Returns a list of descriptions of the constructs of the given regular
+        expression, a string or compiled pattern, which may take exponential
+        or polynomial time to fail to match, or an empty list if none are
+        found. Patterns which are not valid regular expressions have no
+        problems, as they are matched as literals.
+
+        The analysis is a static heuristic, which looks for:
+
+        * nested quantifiers, where an unbounded repeat is the last thing
+          matched by an iteration of an outer repeat, and can match the
+          first character of the next iteration, e.g. '(a+)+',
+          '(\\w+\\s?)*' or '(.*,)*', but not '(\\w+\\.)*',
+        * ambiguous alternations within a repeat, where two alternatives can
+          match the same character, or can both match nothing, e.g. '(a|a)*',
+        * leading '.*' prefixes followed by another unbounded repeat which
+          must be followed by something else, e.g. '.*a.*b', which
+          backtrack in quadratic time.
+
+        Results are memoized by pattern.
+    '''
+    key = (getattr(pattern, 'pattern', pattern), getattr(pattern, 'flags', 0))
+    problems = _pattern_problems.get(key)
+    if problems is None:
+        problems = _pattern_problems[key] = _analyze_pattern(*key)
+    return problems
+
+
+def _analyze_pattern(pattern, flags):
+    try:
+        parsed = list(sre_parse.parse(pattern, flags))
+    except Exception:
+        return []
+
+    problems = []
+    _walk(parsed, problems)
+    if parsed and _leading_any_repeat(parsed[0]) and \
+            _repeat_before_required(parsed[1:], True):
+        problems.append("a leading '.*' followed by another unbounded "
+                        "repeat takes quadratic time")
+
+    unique = []
+    for problem in problems:
+        if problem not in unique:
+            unique.append(problem)
+    return unique
+
+
+def check_patterns(patterns, kind, safety='warn'):
+    '''
+        Analyses each of the given patterns, as for :py:func:`analyze_pattern`,
+        and logs a warning for each unsafe pattern, the first time it is
+        seen, if `safety` is 'warn' (or None), or raises a ValueError if
+        `safety` is 'error'. Nothing is checked if it is 'off' (or False).
+
+        :param kind: the option the patterns were given in, e.g. 'origins',
+            for the messages.
+    '''
+    if safety is None or safety is True:
+        safety = 'warn'
+    elif safety is False:
+        safety = 'off'
+    if safety not in PATTERN_SAFETY_LEVELS:
+        raise ValueError("Invalid pattern_safety %r, expected one of %s"
+                         % (safety, ', '.join(PATTERN_SAFETY_LEVELS)))
+    if safety == 'off':
+        return
+
+    for pattern in patterns:
+        if not isinstance(getattr(pattern, 'pattern', pattern), string_types):
+            continue
+        problems = analyze_pattern(pattern)
+        if not problems:
+            continue
+        message = ("Unsafe regular expression %r in %s: %s"
+                   % (getattr(pattern, 'pattern', pattern), kind,
+                      '; '.join(problems)))
+        if safety == 'error':
+            raise ValueError(message)
+        if message not in _reported:
+            _reported.add(message)
+            LOG.warning(message)
+
+
+def _children(op, av):
+    '''
+        Returns the sub-patterns of a parsed item, as lists of items.
+    '''
+    if op in REPEATS or op is POSSESSIVE_REPEAT:
+        return [av[2]]
+    if op == sre_constants.SUBPATTERN:
+        return [av[-1]]
+    if op == sre_constants.BRANCH:
+        return list(av[1])
+    if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return [av[1]]
+    if op is ATOMIC_GROUP:
+        return [av]
+    if op == sre_constants.GROUPREF_EXISTS:
+        return [p for p in av[1:] if p is not None]
+    return []
+
+
+def _walk(items, problems, repeated=False):
+    '''
+        Appends the problems of the given items to the list, where repeated
+        is True if they are within a repeat which may match more than once.
+    '''
+    for op, av in items:
+        if op is POSSESSIVE_REPEAT or op is ATOMIC_GROUP:
+            continue
+        if op in REPEATS and av[1] > 1:
+            body = list(av[2])
+            first, _ = _first_chars(body)
+            if _ends_with_repeat(body, first):
+                problems.append("nested quantifiers can match the same "
+                                "input in exponentially many ways")
+            _walk(body, problems, True)
+            continue
+        if op == sre_constants.BRANCH and repeated:
+            alternatives = [_first_chars(list(p)) for p in av[1]]
+            for i, (first, nullable) in enumerate(alternatives):
+                for other, other_nullable in alternatives[i + 1:]:
+                    if (nullable and other_nullable) or \
+                            _overlap(first, other):
+                        problems.append("repeated alternatives can match "
+                                        "the same input")
+        for child in _children(op, av):
+            _walk(list(child), problems, repeated)
+
+
+def _first_chars(items):
+    '''
+        Returns the (chars, nullable) of a sequence of parsed items, where
+        chars is the set of characters the sequence may start with, as a
+        (negated, characters) pair, and nullable is True if it may match the
+        empty string.
+    '''
+    chars = NOTHING
+    for op, av in items:
+        if op in ZERO_WIDTH:
+            continue
+        single = _single_chars(op, av)
+        if single is not None:
+            return _union(chars, single), False
+        if op in REPEATS or op is POSSESSIVE_REPEAT:
+            child, nullable = _first_chars(list(av[2]))
+            chars = _union(chars, child)
+            if av[0] > 0 and not nullable:
+                return chars, False
+            continue
+        if op == sre_constants.SUBPATTERN or op is ATOMIC_GROUP:
+            child, nullable = _first_chars(list(_children(op, av)[0]))
+            chars = _union(chars, child)
+            if not nullable:
+                return chars, False
+            continue
+        if op == sre_constants.BRANCH:
+            any_nullable = False
+            for alternative in av[1]:
+                child, nullable = _first_chars(list(alternative))
+                chars = _union(chars, child)
+                any_nullable = any_nullable or nullable
+            if not any_nullable:
+                return chars, False
+            continue
+        # Anything else, e.g. a back reference, may match anything.
+        return ANYTHING, False
+    return chars, True
+
+
+def _ends_with_repeat(items, chars, tail=()):
+    '''
+        Returns True if the given sequence, followed by the given tail of
+        single character sets, may end with an unbounded repeat which can
+        match any of the given characters, and every character of the tail.
+        Such a repeat can match the same input as the tail, and the start of
+        the next iteration of an enclosing repeat.
+    '''
+    for op, av in reversed(items):
+        if op in ZERO_WIDTH:
+            continue
+        if op is POSSESSIVE_REPEAT or op is ATOMIC_GROUP:
+            return False
+        single = _single_chars(op, av)
+        if single is not None:
+            tail = (single,) + tuple(tail)
+            continue
+        if op in REPEATS:
+            body = list(av[2])
+            first, nullable = _first_chars(body)
+            if av[1] == MAXREPEAT and _overlap(first, chars) and \
+                    all(_overlap(first, t) for t in tail):
+                return True
+            if _ends_with_repeat(body, chars, tail):
+                return True
+            if av[0] > 0 and not nullable:
+                return False
+            continue
+        if op == sre_constants.SUBPATTERN:
+            body = list(av[-1])
+            if _ends_with_repeat(body, chars, tail):
+                return True
+            if not _first_chars(body)[1]:
+                return False
+            continue
+        if op == sre_constants.BRANCH:
+            alternatives = [list(p) for p in av[1]]
+            if any(_ends_with_repeat(p, chars, tail) for p in alternatives):
+                return True
+            if not any(_first_chars(p)[1] for p in alternatives):
+                return False
+            continue
+        return False
+    return False
+
+
+def _leading_any_repeat(item):
+    op, av = item
+    return (op in REPEATS and av[1] == MAXREPEAT and
+            _first_chars(list(av[2]))[0] == ANYTHING)
+
+
+def _repeat_before_required(items, tail_nullable):
+    '''
+        Returns True if the given sequence, followed by a tail which may or
+        may not match the empty string, contains an unbounded repeat which is
+        followed by something which must match.
+    '''
+    for i, (op, av) in enumerate(items):
+        rest_nullable = tail_nullable and _first_chars(items[i + 1:])[1]
+        if op in REPEATS and av[1] == MAXREPEAT and not rest_nullable:
+            return True
+        if op is POSSESSIVE_REPEAT or op is ATOMIC_GROUP:
+            continue
+        for child in _children(op, av):
+            if _repeat_before_required(list(child), rest_nullable):
+                return True
+    return False
+
+
+def _char(code):
+    return unichr(code).lower()
+
+
+def _single_chars(op, av):
+    '''
+        Returns the set of characters matched by a parsed item which matches
+        exactly one character, or None for any other item.
+    '''
+    if op == sre_constants.LITERAL:
+        return False, frozenset([_char(av)])
+    if op == sre_constants.NOT_LITERAL:
+        return True, frozenset([_char(av)])
+    if op == sre_constants.ANY:
+        return ANYTHING
+    if op == sre_constants.IN:
+        return _set_chars(av)
+    return None
+
+
+def _set_chars(items):
+    '''
+        Returns the set of characters matched by a parsed character set.
+    '''
+    negated = False
+    chars = set()
+    for op, av in items:
+        if op == sre_constants.NEGATE:
+            negated = True
+        elif op == sre_constants.LITERAL:
+            chars.add(_char(av))
+        elif op == sre_constants.RANGE and av[1] - av[0] < MAX_RANGE_SIZE:
+            chars.update(_char(c) for c in range(av[0], av[1] + 1))
+        elif op == sre_constants.CATEGORY and av in CATEGORY_CHARS:
+            chars.update(CATEGORY_CHARS[av])
+        else:
+            # Wide ranges and other categories may match almost anything,
+            # and so almost nothing when negated.
+            return NOTHING if negated else ANYTHING
+    return negated, frozenset(chars)
+
+
+def _union(chars, other):
+    (negated, a), (other_negated, b) = chars, other
+    if negated and other_negated:
+        return True, a & b
+    if negated:
+        return True, a - b
+    if other_negated:
+        return True, b - a
+    return False, a | b
+
+
+def _overlap(chars, other):
+    '''
+        Returns True if two sets of characters, as returned by
+        :py:func:`_first_chars`, have a character in common.
+    '''
+    (negated, a), (other_negated, b) = chars, other
+    if negated and other_negated:
+        return True
+    if negated:
+        return bool(b - a)
+    if other_negated:
+        return bool(a - b)
+    return bool(a & b)
@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+    flask_cors
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import re
+import time
+import logging
+import threading
+from .origins import canonicalize_origin
+try:
+    from collections import OrderedDict
+except ImportError:  # Python 2.6
+    OrderedDict = None
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # Python 2, without the futures backport
+    ThreadPoolExecutor = None
+
+LOG = logging.getLogger("flask.ext.cors")
+
+# A monotonic clock, where available, so that cache entries do not expire
+# early or late when the system time changes.
+monotonic = getattr(time, 'monotonic', time.time)
+
+# Valid SQL identifiers, for the table and column names of SQLiteOriginStore.
+SQL_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# SQLite limits the number of parameters of a statement to 999 by default.
+SQLITE_MAX_PARAMETERS = 500
+
+
+class OriginStore(object):
+    '''
+        The interface of dynamic sources of allowed origins, such as a
+        database of tenants, which may be given in the `origins` option
+        alongside, or instead of, literal origins and regular expressions.
+
+        Subclasses implement :py:meth:`lookup`, and may override
+        :py:meth:`contains` if a single origin can be checked more cheaply.
+        Origins are always given in their canonical form, e.g.
+        'https://foo.com', as returned by
+        :py:func:`flask_cors.origins.canonicalize_origin`.
+
+        Stores given in the options are wrapped in a
+        :py:class:`CachedOriginStore`, so they are only consulted when the
+        cache misses.
+    '''
+
+    def lookup(self, origins):
+        '''
+            Returns the set of the given origins which are allowed.
+        '''
+        raise NotImplementedError
+
+    def contains(self, origin):
+        '''
+            Returns True if the given origin is allowed.
+        '''
+        return origin in self.lookup([origin])
+
+    def __repr__(self):
+        return '<%s>' % self.__class__.__name__
+
+
+class SQLiteOriginStore(OriginStore):
+    '''
+        A reference :py:class:`OriginStore`, which reads the allowed origins
+        from a single column table of an SQLite database. The table is
+        created if it does not exist.
+
+        Each thread opens its own connection, so an in-memory database
+        (':memory:') is only visible to the thread which created it, and
+        a file should be used instead. The `sqlite3` module is only imported
+        when a store is created, as some Python builds do not include it.
+
+        :param database: the path of the SQLite database.
+
+        :param table: the name of the table of allowed origins.
+
+        :param column: the name of the column of allowed origins.
+    '''
+
+    def __init__(self, database, table='cors_origins', column='origin'):
+        for identifier in table, column:
+            if not SQL_IDENTIFIER.match(identifier):
+                raise ValueError("Invalid SQL identifier: %r" % identifier)
+
+        self.database = database
+        self.table = table
+        self.column = column
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS %s (%s TEXT PRIMARY KEY)'
+                     % (table, column))
+        conn.commit()
+
+    def _connection(self):
+        try:
+            return self._local.connection
+        except AttributeError:
+            import sqlite3
+            conn = self._local.connection = sqlite3.connect(self.database)
+            return conn
+
+    def lookup(self, origins):
+        origins = list(origins)
+        conn = self._connection()
+        allowed = set()
+        for i in range(0, len(origins), SQLITE_MAX_PARAMETERS):
+            chunk = origins[i:i + SQLITE_MAX_PARAMETERS]
+            query = 'SELECT %s FROM %s WHERE %s IN (%s)' % (
+                self.column, self.table, self.column,
+                ', '.join('?' * len(chunk)))
+            allowed.update(row[0] for row in conn.execute(query, chunk))
+        return allowed
+
+    def add(self, *origins):
+        '''
+            Adds the given origins to the table, in their canonical form.
+        '''
+        conn = self._connection()
+        conn.executemany('INSERT OR IGNORE INTO %s (%s) VALUES (?)'
+                         % (self.table, self.column),
+                         [(canonicalize_origin(origin) or origin.lower(),)
+                          for origin in origins])
+        conn.commit()
+
+    def remove(self, *origins):
+        '''
+            Removes the given origins from the table.
+        '''
+        conn = self._connection()
+        conn.executemany('DELETE FROM %s WHERE %s = ?'
+                         % (self.table, self.column),
+                         [(canonicalize_origin(origin) or origin.lower(),)
+                          for origin in origins])
+        conn.commit()
+
+    def __repr__(self):
+        return '<%s %s.%s of %r>' % (self.__class__.__name__, self.table,
+                                     self.column, self.database)
+
+
+class Flight(object):
+    '''
+        A lookup of an origin in progress, which any number of threads may
+        wait for. The result is True or False, or None if the lookup failed.
+    '''
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class CachedOriginStore(OriginStore):
+    '''
+        Caches the answers of another :py:class:`OriginStore` in a bounded,
+        thread-safe LRU cache, so that the store is only consulted for
+        origins which have not been looked up recently.
+
+        Allowed origins are cached for `ttl` seconds, and disallowed origins
+        for `negative_ttl` seconds, which is usually shorter, so that newly
+        allowed origins take effect quickly. Expired answers continue to be
+        served for a further `stale_ttl` seconds, while they are refreshed
+        in the background.
+
+        Concurrent lookups of the same origin are coalesced, so the store is
+        asked about each origin by at most one thread at a time, and every
+        other thread waits for its answer. If the store does not answer
+        within `timeout` seconds, or fails, the origin is allowed if
+        `fail_open` is True, and disallowed otherwise, without caching the
+        answer.
+
+        :param store: the store to cache the answers of.
+
+        :param ttl: the number of seconds for which allowed origins are
+            cached.
+
+        :param negative_ttl: the number of seconds for which disallowed
+            origins are cached.
+
+        :param maxsize: the maximum number of origins cached.
+
+        :param stale_ttl: the number of seconds for which expired answers
+            are served while they are refreshed.
+
+        :param timeout: the number of seconds to wait for the store, or None
+            to wait indefinitely.
+
+        :param fail_open: whether origins are allowed when the store times
+            out or fails.
+
+        :param workers: the number of threads used for background lookups.
+    '''
+
+    def __init__(self, store, ttl=60, negative_ttl=5, maxsize=1024,
+                 stale_ttl=0, timeout=None, fail_open=False, workers=4,
+                 clock=monotonic):
+        self.store = store
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.fail_open = fail_open
+        self.workers = workers
+        self._clock = clock
+        # Maps origins to (allowed, expiry) pairs, least recently used first
+        self._entries = (OrderedDict or dict)()
+        # Maps origins to the Flight of their lookup in progress
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+        self._failures = 0
+
+    def _get(self, origin, now):
+        '''
+            Returns the cached (allowed, expiry) pair for the origin, which
+            may be stale, or None if it is not cached or has expired.
+        '''
+        with self._lock:
+            entry = self._entries.pop(origin, None)
+            if entry is None or entry[1] + self.stale_ttl <= now:
+                self._misses += 1
+                return None
+            # Reinsert the entry to mark it as the most recently used.
+            self._entries[origin] = entry
+            if entry[1] <= now:
+                self._stale += 1
+            else:
+                self._hits += 1
+            return entry
+
+    def _put(self, origin, allowed, now):
+        expiry = now + (self.ttl if allowed else self.negative_ttl)
+        with self._lock:
+            self._entries.pop(origin, None)
+            self._entries[origin] = (allowed, expiry)
+            if len(self._entries) > self.maxsize:
+                if OrderedDict is None:
+                    self._entries.popitem()
+                else:
+                    self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def lookup(self, origins):
+        now = self._clock()
+        allowed = set()
+        misses = []
+        stale = []
+        for origin in origins:
+            entry = self._get(origin, now)
+            if entry is None:
+                misses.append(origin)
+                continue
+            if entry[0]:
+                allowed.add(origin)
+            if entry[1] <= now:
+                stale.append(origin)
+
+        if stale:
+            self._start(stale, background=True)
+        if misses:
+            found = self._fetch(misses)
+            allowed.update(origin for origin in misses if found[origin])
+        return allowed
+
+    def contains(self, origin):
+        now = self._clock()
+        entry = self._get(origin, now)
+        if entry is None:
+            return self._fetch([origin])[origin]
+        if entry[1] <= now:
+            self._start([origin], background=True)
+        return entry[0]
+
+    def cached(self, origin):
+        '''
+            Returns True if an answer for the origin is cached, which may be
+            stale, so that :py:meth:`contains` will not wait for the store.
+        '''
+        with self._lock:
+            entry = self._entries.get(origin)
+        return entry is not None and entry[1] + self.stale_ttl > self._clock()
+
+    def _fetch(self, origins):
+        '''
+            Looks up the given origins in the store, joining any lookups of
+            them already in progress, and returns a dictionary of their
+            answers.
+        '''
+        # Without a timeout, the lookup can run in the calling thread.
+        flights = self._start(origins, background=self.timeout is not None)
+
+        deadline = None if self.timeout is None else monotonic() + self.timeout
+        found = {}
+        for origin, flight in flights.items():
+            if deadline is None:
+                flight.event.wait()
+            else:
+                flight.event.wait(max(deadline - monotonic(), 0))
+
+            if flight.event.is_set() and flight.result is not None:
+                found[origin] = flight.result
+            else:
+                with self._lock:
+                    self._failures += 1
+                LOG.warning("Origin lookup of %s failed or timed out, "
+                            "%s it", origin,
+                            'allowing' if self.fail_open else 'disallowing')
+                found[origin] = self.fail_open
+        return found
+
+    def _start(self, origins, background):
+        '''
+            Starts a lookup of those of the given origins which are not
+            already being looked up, and returns the Flight of each origin.
+        '''
+        with self._lock:
+            new = [origin for origin in origins if origin not in self._flights]
+            for origin in new:
+                self._flights[origin] = Flight()
+            flights = dict((origin, self._flights[origin])
+                           for origin in origins)
+
+        if new:
+            if background:
+                self._submit(self._run, new)
+            else:
+                self._run(new)
+        return flights
+
+    def _run(self, origins):
+        try:
+            found = self.store.lookup(origins)
+        except Exception:
+            LOG.exception("Origin lookup failed")
+            found = None
+
+        now = self._clock()
+        for origin in origins:
+            if found is not None:
+                self._put(origin, origin in found, now)
+            with self._lock:
+                flight = self._flights.pop(origin)
+            flight.result = None if found is None else origin in found
+            flight.event.set()
+
+    def _submit(self, func, *args):
+        if ThreadPoolExecutor is None:
+            thread = threading.Thread(target=func, args=args)
+            thread.daemon = True
+            thread.start()
+            return
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers)
+        self._executor.submit(func, *args)
+
+    def invalidate(self, *origins):
+        '''
+            Removes the given origins from the cache, or every origin, if
+            none are given.
+        '''
+        with self._lock:
+            if not origins:
+                self._entries.clear()
+            for origin in origins:
+                self._entries.pop(origin, None)
+
+    def stats(self):
+        '''
+            Returns a dictionary of the cache's hit, stale hit, miss,
+            eviction and failed lookup counters, along with its current and
+            maximum size.
+        '''
+        return dict(hits=self._hits,
+                    stale=self._stale,
+                    misses=self._misses,
+                    evictions=self._evictions,
+                    failures=self._failures,
+                    size=len(self._entries),
+                    maxsize=self.maxsize)
+
+    def __repr__(self):
+        return '<%s of %r>' % (self.__class__.__name__, self.store)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+    flask_cors
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+from six import PY2
+from werkzeug.http import HTTP_STATUS_CODES
+from werkzeug.wsgi import get_host
+from .core import *
+
+
+class CORSMiddleware(object):
+    '''
+        WSGI middleware which applies Cross Origin Resource Sharing to any
+        WSGI application, including a Flask app's `wsgi_app`. The arguments
+        are identical to :py:class:`CORS`, and options are evaluated in
+        exactly the same way, except that app-level configuration is read from
+        the optional `config` mapping (e.g. a Flask app's `config`), as there
+        is no application context.
+
+        Valid preflight requests to matching resources are answered directly,
+        with an empty 204 response, without calling the wrapped application.
+        So are requests from disallowed origins to resources with the
+        `reject_disallowed_origins` option, with the `reject_status` and
+        `reject_body`.
+        For other requests, CORS headers are added when the wrapped
+        application starts its response, unless it has already set an
+        Access-Control-Allow-Origin header itself.
+
+        No Flask request or response objects are created.
+
+        :param app: the WSGI application to wrap.
+
+        :param config: a mapping of CORS_* configuration values.
+
+        :type config: dict or None
+    '''
+
+    def __init__(self, app, config=None, **kwargs):
+        self.app = app
+        options = get_config_cors_options(config or {}, kwargs)
+        self.router = ResourceRouter(
+            get_config_resources(config or {}, kwargs),
+            max_length=options.get('max_match_length'))
+
+    def __call__(self, environ, start_response):
+        origin = environ.get('HTTP_ORIGIN')
+        if not origin:
+            return self.app(environ, start_response)
+
+        matched = self.router.match(get_environ_path(environ))
+        if matched is None:
+            return self.app(environ, start_response)
+
+        policy = matched[1]
+        method = environ.get('REQUEST_METHOD', 'GET').upper()
+        request_headers = get_environ_cors_headers(environ)
+
+        if policy.reject_disallowed_origins and origin_rejected(
+                policy, origin, get_environ_host_url(environ)):
+            debugLog("Rejecting request from disallowed Origin:%s", origin)
+            status, headers, body = get_rejection(policy)
+            start_response('%d %s' % (status, HTTP_STATUS_CODES.get(
+                status, 'UNKNOWN').upper()), headers)
+            return [body]
+
+        if method == 'OPTIONS' and request_headers.get(ACL_REQUEST_METHOD):
+            headers = get_cors_header_items(policy, request_headers,
+                                            method, {})
+            # Access-Control-Allow-Methods is only set for valid preflights
+            if any(k == ACL_METHODS for k, _ in headers):
+                start_response('204 No Content', list(headers))
+                return []
+
+        def cors_start_response(status, response_headers, exc_info=None):
+            response_headers = add_cors_headers(policy, request_headers,
+                                                method, response_headers)
+            return start_response(status, response_headers, exc_info)
+
+        return self.app(environ, cors_start_response)
+
+
+def get_environ_path(environ):
+    '''
+        Returns the request path as Flask's `request.path` would, without the
+        script root.
+    '''
+    path = environ.get('PATH_INFO', '')
+    if not PY2:
+        # WSGI strings are bytes decoded as latin-1
+        path = path.encode('latin-1').decode('utf-8', 'replace')
+    return '/' + path.lstrip('/')
+
+
+def get_environ_host_url(environ):
+    '''
+        Returns the origin of the request itself, e.g. 'http://localhost',
+        as Flask's `request.host_url` would, without the trailing slash.
+    '''
+    return '%s://%s' % (environ.get('wsgi.url_scheme', 'http'),
+                        get_host(environ))
+
+
+def get_environ_cors_headers(environ):
+    '''
+        Returns a dictionary of the request headers which are relevant to
+        CORS, from a WSGI environment.
+    '''
+    headers = {'Origin': environ.get('HTTP_ORIGIN')}
+    for name in ACL_REQUEST_METHOD, ACL_REQUEST_HEADERS:
+        value = environ.get('HTTP_' + name.upper().replace('-', '_'))
+        if value is not None:
+            headers[name] = value
+    return headers
+
+
+def add_cors_headers(policy, request_headers, method, response_headers):
+    '''
+        Returns the given list of WSGI response headers with the CORS headers
+        for the request added, replacing any existing headers of the same
+        name.
+    '''
+    vary = []
+    for name, value in response_headers:
+        lower_name = name.lower()
+        if lower_name == 'access-control-allow-origin':
+            debugLog('CORS have been already evaluated, skipping')
+            return response_headers
+        elif lower_name == 'vary':
+            vary.append(value)
+
+    existing = {'Vary': ', '.join(vary)} if vary else {}
+    headers = get_cors_header_items(policy, request_headers, method, existing)
+    if not headers:
+        return response_headers
+
+    replaced = set(k.lower() for k, _ in headers)
+    response_headers = [(name, value) for name, value in response_headers
+                        if name.lower() not in replaced]
+    response_headers.extend(headers)
+    return response_headers
@@ -23,6 +23,26 @@ class InternalsTestCase(unittest.TestCase):
     def test_try_match(self):
         self.assertTrue(try_match('www.com/foo+', 'www.com/foo'))
 
+    def test_compile_pattern(self):
+        compiled = compile_pattern(r'X-Foo-.*')
+        self.assertTrue(compile_pattern(r'X-Foo-.*') is compiled)
+        self.assertTrue(compiled.match('x-foo-bar'))
+        regex = re.compile(r'X-Bar')
+        self.assertTrue(compile_pattern(regex) is regex)
+        # Invalid regular expressions are returned as is, as literals
+        self.assertEqual(compile_pattern(r'X-[Foo'), r'X-[Foo')
+
+    def test_compile_patterns(self):
+        regexes, literals = compile_patterns([r'X-Foo-.*', r'X-[Foo', None])
+        self.assertEqual(len(regexes), 1)
+        self.assertEqual(literals, frozenset([r'X-[Foo']))
+
+    def test_get_allow_headers_invalid_regex(self):
+        options = serialize_options({'allow_headers': [r'X-[Foo', r'X-Bar']})
+
+        self.assertEqual(get_allow_headers(options, 'X-[Foo, X-Bar, X-Baz'),
+                         'X-Bar, X-[Foo')
+
     def test_flexible_str_str(self):
         self.assertEquals(flexible_str('Bar, Foo, Qux'), 'Bar, Foo, Qux')
 
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for the evaluation of Access-Control-Request-Headers
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask_cors.core import *
+
+
+class AllowHeadersMemoTestCase(unittest.TestCase):
+    def test_memoized(self):
+        options = compile_policy(serialize_options(
+            {'allow_headers': ['Content-Type', r'X-Custom-.*']}))
+        memo = options.allow_headers_memo
+
+        for _ in range(3):
+            self.assertEqual(
+                get_allow_headers(options, 'X-Custom-Foo, content-type, X-Bar'),
+                'X-Custom-Foo, content-type')
+        self.assertEqual(memo.stats()['hits'], 2)
+        self.assertEqual(memo.stats()['misses'], 1)
+
+    def test_memo_bounded(self):
+        options = compile_policy(serialize_options({'allow_headers': '*'}))
+        for i in range(ALLOW_HEADERS_MEMO_SIZE * 2):
+            get_allow_headers(options, 'X-Header-%d' % i)
+        self.assertTrue(options.allow_headers_memo.stats()['size'] <=
+                        ALLOW_HEADERS_MEMO_SIZE)
+
+    def test_wildcard(self):
+        options = compile_policy(serialize_options({'allow_headers': '*'}))
+        self.assertTrue(options.allow_headers_wildcard)
+        self.assertEqual(get_allow_headers(options, ' X-Foo ,X-Bar'),
+                         'X-Bar, X-Foo')
+
+        options = compile_policy(serialize_options({'allow_headers': 'X-Foo'}))
+        self.assertFalse(options.allow_headers_wildcard)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for origin canonicalization
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask_cors.core import *
+from flask_cors.origins import *
+
+
+class CanonicalizeOriginTestCase(unittest.TestCase):
+    def test_canonical(self):
+        for origin, canonical in [
+                ('https://App.Example.com', 'https://app.example.com'),
+                ('HTTPS://app.example.com:443', 'https://app.example.com'),
+                ('http://app.example.com:80', 'http://app.example.com'),
+                ('http://app.example.com:0443', 'http://app.example.com:443'),
+                (u'https://bücher.de', 'https://xn--bcher-kva.de'),
+                ('http://[::1]:8080', 'http://[::1]:8080'),
+                ('null', 'null')]:
+            self.assertEqual(canonicalize_origin(origin), canonical, origin)
+
+    def test_malformed(self):
+        for origin in ['www.example.com', 'https://', 'https://a.com/path',
+                       'https://user@a.com', 'https://a.com:', 'https://a..com',
+                       'https://a.com:99999', '1http://a.com', 'https://a.com?x']:
+            self.assertEqual(canonicalize_origin(origin), None, origin)
+
+    def test_policy(self):
+        policy = compile_policy(serialize_options({
+            'origins': ['https://App.Example.com:443', 'www.example.com',
+                        'https://*.customer.com:443'],
+        }))
+        # Malformed origins, such as 'www.example.com', are regular
+        # expressions
+        self.assertEqual(policy.origins_literal,
+                         frozenset(['https://app.example.com']))
+        for origin in ['https://app.example.com', 'https://APP.example.com:443',
+                       'www.example.com', 'https://a.customer.com']:
+            self.assertEqual(get_cors_origin(policy, origin), origin)
+        # Malformed origins are not matched by literals or patterns
+        self.assertEqual(get_cors_origin(policy, 'https://app.example.com/'),
+                         None)
+
+        # ...unless all origins are allowed
+        policy = compile_policy(serialize_options({'origins': '*'}))
+        self.assertEqual(get_cors_origin(policy, 'www.example.com'),
+                         'www.example.com')
+
+    def test_regex_matches_origin_as_sent(self):
+        policy = compile_policy(serialize_options({
+            'origins': [re.compile(r'http://Foo\.com'),
+                        r'https://foo\.com:443'],
+        }))
+        self.assertTrue(match_origin(policy, 'http://Foo.com'))
+        self.assertTrue(match_origin(policy, 'https://foo.com:443'))
+
+
+if __name__ == "__main__":
+    unittest.main()
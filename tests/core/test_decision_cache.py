@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for the decision cache
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask_cors.core import *
+
+
+class DecisionCacheTestCase(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = DecisionCache(maxsize=2, stripes=1)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats(), dict(hits=3, misses=1, evictions=1,
+                                             size=2, maxsize=2))
+
+    def test_disabled_by_default(self):
+        self.assertEqual(compile_policy(serialize_options({})).decision_cache,
+                         None)
+
+    def test_header_items_cached(self):
+        options = compile_policy(serialize_options({
+            'origins': ['http://foo.com', 'http://bar.com'],
+            'vary_header': True,
+            'decision_cache_size': 16}))
+        cache = options.decision_cache
+
+        for _ in range(3):
+            items = get_cors_header_items(options,
+                                          {'Origin': 'http://foo.com'},
+                                          'GET', {})
+            self.assertEqual(dict(items), {ACL_ORIGIN: 'http://foo.com',
+                                           'Vary': 'Origin'})
+
+        items = get_cors_header_items(options, {'Origin': 'http://foo.com'},
+                                      'GET', {'Vary': 'Accept-Encoding'})
+        self.assertEqual(dict(items)['Vary'], 'Origin, Accept-Encoding')
+
+        items = get_cors_header_items(options, {'Origin': 'http://baz.com'},
+                                      'GET', {})
+        self.assertEqual(items, ())
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
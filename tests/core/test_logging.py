@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for Flask-Cors' logging helpers
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask import Flask
+from flask_cors.core import *
+
+
+class LoggingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.logger = logging.getLogger('%s.cors' % self.app.logger_name)
+        self.level = self.logger.level
+
+    def tearDown(self):
+        self.logger.setLevel(self.level)
+
+    def test_logger_cached_per_app(self):
+        self.assertEqual(getLogger(), DEFAULT_LOGGER)
+        self.assertTrue(getLogger(self.app) is self.logger)
+        with self.app.test_request_context():
+            self.assertTrue(getLogger() is self.logger)
+        self.assertTrue(self.app.extensions[LOGGER_EXTENSION_KEY] is
+                        self.logger)
+
+    def test_disabled_logging_is_lazy(self):
+        calls = []
+
+        def expensive():
+            calls.append(True)
+            return 'expensive'
+
+        self.logger.setLevel(logging.INFO)
+        with self.app.test_request_context():
+            debugLog('%s', LazyString(expensive))
+        self.assertEqual(calls, [])
+
+        self.logger.setLevel(logging.DEBUG)
+        with self.app.test_request_context():
+            debugLog('%s', LazyString(expensive))
+        self.assertTrue(calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
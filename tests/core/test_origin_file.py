@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for memory-mapped origin files
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import os
+import shutil
+import tempfile
+from flask_cors.core import *
+from flask_cors.origins import *
+
+
+class OriginFileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'origins.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_lookup(self):
+        origins = ['https://partner%d.com' % i for i in range(10000)]
+        write_origin_file(self.path, origins + ['https://Partner1.com'])
+        origin_file = OriginFile(self.path)
+
+        self.assertEqual(len(origin_file), 10000)
+        for origin in origins[::997] + ['https://partner0.com',
+                                        'https://partner9999.com']:
+            self.assertTrue(origin in origin_file, origin)
+        for origin in ['https://partner10000.com', 'https://partner', '',
+                       'https://partner1.com.evil.com', 'zzz']:
+            self.assertFalse(origin in origin_file, origin)
+        origin_file.close()
+
+    def test_empty(self):
+        write_origin_file(self.path, [])
+        self.assertFalse('https://foo.com' in OriginFile(self.path))
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not an origin file')
+        self.assertRaises(ValueError, OriginFile, self.path)
+
+    def test_policy(self):
+        write_origin_file(self.path, ['https://foo.com', 'https://bar.com'])
+        policy = compile_policy(serialize_options({
+            'origins': OriginFile(self.path),
+            'vary_header': True,
+        }))
+        headers = get_cors_headers(policy, {'Origin': 'https://FOO.com'},
+                                   'GET', {})
+        self.assertEqual(headers.get(ACL_ORIGIN), 'https://FOO.com')
+        self.assertEqual(headers.get('Vary'), 'Origin')
+        self.assertEqual(get_cors_origin(policy, 'https://baz.com'), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for matching request origins against the allowed origins
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask_cors.core import *
+
+
+class OriginMatchingTestCase(unittest.TestCase):
+    def test_classify_origins(self):
+        literal, regexes, wildcard, subdomains, ranges = classify_origins([
+            'http://Foo.com', r'https?://.*\.example\.com', '[', '.*',
+            re.compile(r'http://bar\.com'), 'https://*.Customer.com',
+            'http://localhost:*'
+        ])
+        self.assertEqual(literal, frozenset(['http://foo.com', '[']))
+        self.assertEqual([r.pattern for r in regexes],
+                         [r'https?://.*\.example\.com', r'http://bar\.com'])
+        self.assertTrue(wildcard)
+        self.assertEqual(len(subdomains), 1)
+        self.assertEqual(len(ranges), 1)
+
+    def test_literal_origins(self):
+        options = serialize_options({'origins': ['http://foo.com',
+                                                 'http://bar.com']})
+        self.assertEqual(get_cors_origin(options, 'http://foo.com'),
+                         'http://foo.com')
+        self.assertEqual(get_cors_origin(options, 'HTTP://FOO.COM'),
+                         'HTTP://FOO.COM')
+        self.assertEqual(get_cors_origin(options, 'http://foo.com.evil.com'),
+                         None)
+        self.assertEqual(get_cors_origin(options, 'http://fooxcom'), None)
+
+    def test_many_literal_origins(self):
+        options = compile_policy(serialize_options({
+            'origins': ['https://customer%d.com' % i for i in range(5000)]
+        }))
+        self.assertEqual(len(options.origins_literal), 5000)
+        self.assertEqual(options.origins_regex, ())
+        self.assertTrue(match_origin(options, 'https://customer4999.com'))
+        self.assertFalse(match_origin(options, 'https://customer5000.com'))
+
+    def test_regex_origins(self):
+        options = serialize_options({'origins': r'https?://.*\.example\.com'})
+        self.assertTrue(match_origin(options, 'https://app.EXAMPLE.com'))
+        self.assertFalse(match_origin(options, 'https://example.org'))
+
+    def test_regex_without_common_regex_chars(self):
+        # Strings which are not well-formed origins are regular expressions,
+        # even without characters such as '*' or '\\'.
+        for pattern, origin in [('http://foo.com|http://bar.com',
+                                 'http://bar.com'),
+                                ('http://.+.foo.com', 'http://a.foo.com'),
+                                ('http://a{1,3}.com', 'http://aa.com')]:
+            policy = compile_policy(serialize_options({'origins': pattern}))
+            self.assertEqual(len(policy.origins_regex), 1, pattern)
+            self.assertTrue(match_origin(policy, origin), pattern)
+
+    def test_wildcard(self):
+        options = serialize_options({'origins': '*', 'send_wildcard': True})
+        self.assertEqual(get_cors_origin(options, 'http://foo.com'), '*')
+
+        options = serialize_options({'origins': '*'})
+        self.assertEqual(get_cors_origin(options, 'http://foo.com'),
+                         'http://foo.com')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for the Bloom filter origin prefilter
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask import Flask
+from flask_cors import CORS
+from flask_cors.core import *
+from flask_cors.origins import *
+
+
+class BloomFilterTestCase(unittest.TestCase):
+    def test_no_false_negatives(self):
+        keys = ['https://partner%d.com' % i for i in range(5000)]
+        bloom = BloomFilter(len(keys))
+        for key in keys:
+            bloom.add(key)
+        for key in keys:
+            self.assertTrue(key in bloom)
+
+        false_positives = sum(1 for i in range(5000)
+                              if 'https://other%d.com' % i in bloom)
+        # The expected rate is 1%
+        self.assertTrue(false_positives < 150, false_positives)
+        self.assertTrue(bloom.stats()['expected_false_positive_rate'] < 0.02)
+
+    def test_origin_keys(self):
+        self.assertEqual(get_origin_keys('https://a.b.example.com:8443'),
+                         ['https://a.b.example.com:8443',
+                          'https://*.b.example.com:8443',
+                          'https://*.example.com:8443',
+                          'https://*.com:8443'])
+        self.assertEqual(get_origin_keys('null'), ['null'])
+
+
+class PolicyPrefilterTestCase(unittest.TestCase):
+    def test_policy(self):
+        policy = compile_policy(serialize_options({
+            'origins': ['https://foo.com', 'https://*.customer.com'],
+            'origin_prefilter': True,
+        }))
+        self.assertTrue(match_origin(policy, 'https://FOO.com'))
+        self.assertTrue(match_origin(policy, 'https://a.customer.com'))
+        self.assertFalse(match_origin(policy, 'https://customer.com'))
+        for i in range(100):
+            self.assertFalse(match_origin(policy, 'https://evil%d.com' % i))
+
+        stats = policy.origin_prefilter.stats()
+        self.assertEqual(stats['checks'], 103)
+        self.assertEqual(stats['rejections'] + stats['false_positives'], 101)
+
+    def test_not_built_for_regexes(self):
+        policy = compile_policy(serialize_options({
+            'origins': ['https://foo.com', r'https://.*\.bar\.com'],
+            'origin_prefilter': True,
+        }))
+        self.assertEqual(policy.origin_prefilter, None)
+        self.assertTrue(match_origin(policy, 'https://a.bar.com'))
+
+    def test_extension_stats(self):
+        app = Flask(__name__)
+        cors = CORS(app, origins='https://foo.com', origin_prefilter=True)
+
+        @app.route('/')
+        def index():
+            return 'Welcome!'
+
+        with app.test_client() as c:
+            c.get('/', headers={'Origin': 'https://bar.com'})
+        stats = cors.stats()['origin_prefilter']['/*']
+        self.assertEqual(stats['checks'], 1)
+        self.assertTrue('false_positive_rate' in stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for CIDR block and port range origin rules
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import socket
+from flask_cors.core import *
+from flask_cors.origins import *
+
+HAS_IPV6 = hasattr(socket, 'inet_pton')
+
+
+class OriginRangeTableTestCase(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_range_pattern('HTTP://10.1.2.3/8:8000-8099'),
+                         ('http', '10.1.2.3', (32, 10 << 24, (11 << 24) - 1),
+                          (8000, 8099)))
+        self.assertEqual(parse_range_pattern('http://localhost:*'),
+                         ('http', 'localhost', None, (1, 65535)))
+        self.assertEqual(parse_range_pattern('https://10.0.0.0/8'),
+                         ('https', '10.0.0.0', (32, 10 << 24, (11 << 24) - 1),
+                          (443, 443)))
+        for origin in ['http://10.0.0.1', 'http://localhost:5000',
+                       'https://*.example.com', r'http://foo\.com']:
+            self.assertEqual(parse_range_pattern(origin), None, origin)
+
+    def test_invalid(self):
+        for origin in ['http://10.0.0.0/33', 'http://localhost/8',
+                       'http://localhost:9000-8000', 'http://a:1-70000',
+                       'foo://10.0.0.0/8']:
+            self.assertRaises(ValueError, parse_range_pattern, origin)
+
+    def test_match(self):
+        table = OriginRangeTable(['http://10.0.0.0/8:8000-8099',
+                                  'http://10.2.0.0/16:9000',
+                                  'http://localhost:*',
+                                  'http://192.168.1.0/24'])
+        self.assertEqual(len(table), 4)
+        for origin in ['http://10.2.3.4:8050', 'http://10.2.3.4:9000',
+                       'http://10.255.255.255:8000', 'http://localhost:5000',
+                       'http://localhost', 'http://192.168.1.200']:
+            self.assertTrue(table.match(origin), origin)
+        for origin in ['http://10.3.3.4:9000', 'http://11.0.0.0:8000',
+                       'https://10.2.3.4:8050', 'http://192.168.2.1',
+                       'http://192.168.1.200:8080', 'http://localhost.com',
+                       'http://9.255.255.255:8000']:
+            self.assertFalse(table.match(origin), origin)
+
+    def test_overlapping_rules(self):
+        table = OriginRangeTable(['http://10.0.0.0/8:8000-8010',
+                                  'http://10.0.0.0/16:8005-8020',
+                                  'http://10.0.0.0/24:9000'])
+        self.assertTrue(table.match('http://10.0.0.1:8020'))
+        self.assertTrue(table.match('http://10.0.0.1:9000'))
+        self.assertFalse(table.match('http://10.0.1.1:9000'))
+        self.assertFalse(table.match('http://10.1.0.1:8020'))
+        self.assertTrue(table.match('http://10.1.0.1:8010'))
+
+    @unittest.skipUnless(HAS_IPV6, 'inet_pton is not available')
+    def test_ipv6(self):
+        table = OriginRangeTable(['https://[fd00::]/8'])
+        self.assertTrue(table.match('https://[fd12::1]'))
+        self.assertFalse(table.match('https://[fe80::1]'))
+        self.assertFalse(table.match('https://10.0.0.1'))
+
+    def test_policy(self):
+        policy = compile_policy(serialize_options({
+            'origins': ['http://foo.com', 'http://10.0.0.0/8:8000-8099'],
+            'origin_prefilter': True,
+            'vary_header': True,
+        }))
+        self.assertTrue(match_origin(policy, 'http://10.1.1.1:8080'))
+        self.assertTrue(match_origin(policy, 'http://foo.com'))
+        self.assertFalse(match_origin(policy, 'http://10.1.1.1:8100'))
+        # The prefilter can not represent ranges, so is not built
+        self.assertEqual(policy.origin_prefilter, None)
+        self.assertTrue(policy.needs_vary)
+
+
+if __name__ == "__main__":
+    unittest.main()
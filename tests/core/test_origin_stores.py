@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for dynamic origin stores
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import os
+import time
+import shutil
+import threading
+import tempfile
+from flask_cors.core import *
+from flask_cors.stores import *
+
+
+class CountingStore(OriginStore):
+    def __init__(self, origins):
+        self.origins = set(origins)
+        self.lookups = []
+
+    def lookup(self, origins):
+        self.lookups.append(list(origins))
+        return self.origins.intersection(origins)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class SQLiteOriginStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.store = SQLiteOriginStore(os.path.join(self.tempdir, 'cors.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_lookup(self):
+        self.store.add('https://Foo.com', 'https://bar.com')
+        self.assertTrue(self.store.contains('https://foo.com'))
+        self.assertFalse(self.store.contains('https://baz.com'))
+
+        origins = ['https://customer%d.com' % i for i in range(1200)]
+        self.store.add(*origins[::2])
+        self.assertEqual(self.store.lookup(origins), set(origins[::2]))
+
+        self.store.remove('https://foo.com')
+        self.assertFalse(self.store.contains('https://foo.com'))
+
+    def test_invalid_identifier(self):
+        self.assertRaises(ValueError, SQLiteOriginStore, ':memory:',
+                          table='origins; DROP TABLE users')
+
+
+class CachedOriginStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = CountingStore(['https://foo.com'])
+        self.clock = FakeClock()
+        self.cache = CachedOriginStore(self.store, ttl=60, negative_ttl=5,
+                                       maxsize=2, clock=self.clock)
+
+    def test_ttl(self):
+        for _ in range(3):
+            self.assertTrue(self.cache.contains('https://foo.com'))
+            self.assertFalse(self.cache.contains('https://bar.com'))
+        self.assertEqual(len(self.store.lookups), 2)
+
+        # Disallowed origins expire first
+        self.clock.now = 10
+        self.cache.contains('https://foo.com')
+        self.cache.contains('https://bar.com')
+        self.assertEqual(self.store.lookups[2:], [['https://bar.com']])
+
+        self.clock.now = 61
+        self.cache.contains('https://foo.com')
+        self.assertEqual(self.store.lookups[3:], [['https://foo.com']])
+
+    def test_bulk_lookup(self):
+        self.cache.contains('https://foo.com')
+        self.assertEqual(self.cache.lookup(['https://foo.com', 'https://bar.com']),
+                         set(['https://foo.com']))
+        self.assertEqual(self.store.lookups[1:], [['https://bar.com']])
+
+    def test_bounded(self):
+        for i in range(5):
+            self.cache.contains('https://%d.com' % i)
+        stats = self.cache.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['evictions'], 3)
+
+        self.cache.invalidate()
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+
+class SlowStore(OriginStore):
+    def __init__(self, origins, error=None):
+        self.origins = set(origins)
+        self.error = error
+        self.release = threading.Event()
+        self.lookups = []
+
+    def lookup(self, origins):
+        self.lookups.append(list(origins))
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.origins.intersection(origins)
+
+
+class CoalescedLookupTestCase(unittest.TestCase):
+    def test_single_flight(self):
+        store = SlowStore(['https://foo.com'])
+        cache = CachedOriginStore(store)
+        results = []
+
+        def check():
+            results.append(cache.contains('https://foo.com'))
+
+        threads = [threading.Thread(target=check) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        store.release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(store.lookups, [['https://foo.com']])
+
+    def test_timeout(self):
+        for fail_open in True, False:
+            store = SlowStore(['https://foo.com'])
+            cache = CachedOriginStore(store, timeout=0.01, fail_open=fail_open)
+            self.assertEqual(cache.contains('https://bar.com'), fail_open)
+            self.assertEqual(cache.stats()['failures'], 1)
+
+            # The answer arrives later, and is cached
+            store.release.set()
+            for _ in range(100):
+                if cache.stats()['size']:
+                    break
+                time.sleep(0.01)
+            self.assertFalse(cache.contains('https://bar.com'))
+
+    def test_store_error(self):
+        store = SlowStore([], error=IOError('Connection refused'))
+        store.release.set()
+        cache = CachedOriginStore(store, fail_open=True)
+        self.assertTrue(cache.contains('https://foo.com'))
+        # Failed lookups are not cached
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_stale_while_revalidate(self):
+        store = SlowStore(['https://foo.com'])
+        store.release.set()
+        clock = FakeClock()
+        cache = CachedOriginStore(store, ttl=60, stale_ttl=30, clock=clock)
+        self.assertTrue(cache.contains('https://foo.com'))
+
+        store.origins = set()
+        store.release.clear()
+        clock.now = 70
+        # The stale answer is served immediately, while it is refreshed
+        self.assertTrue(cache.contains('https://foo.com'))
+        self.assertTrue(cache.contains('https://foo.com'))
+        store.release.set()
+        for _ in range(100):
+            if not cache._flights:
+                break
+            time.sleep(0.01)
+        self.assertFalse(cache.contains('https://foo.com'))
+        self.assertEqual(len(store.lookups), 2)
+
+        # Entries which are older than the stale period are looked up again
+        clock.now = 200
+        self.assertFalse(cache.contains('https://foo.com'))
+        self.assertEqual(len(store.lookups), 3)
+
+
+class PolicyOriginStoreTestCase(unittest.TestCase):
+    def test_get_cors_origin(self):
+        store = CountingStore(['https://foo.com'])
+        policy = compile_policy(serialize_options({
+            'origins': ['https://bar.com', store],
+            'decision_cache_size': 16,
+            'vary_header': True,
+        }))
+        self.assertEqual(policy.decision_cache, None)
+
+        for _ in range(2):
+            self.assertEqual(get_cors_origin(policy, 'HTTPS://FOO.COM'),
+                             'HTTPS://FOO.COM')
+            self.assertEqual(get_cors_origin(policy, 'https://bar.com'),
+                             'https://bar.com')
+            self.assertEqual(get_cors_origin(policy, 'https://baz.com'), None)
+        # Literal origins never reach the store, and answers are cached
+        self.assertEqual(store.lookups, [['https://foo.com'],
+                                         ['https://baz.com']])
+
+    def test_single_store_varies(self):
+        policy = compile_policy(serialize_options({
+            'origins': CountingStore(['https://foo.com']),
+            'vary_header': True,
+        }))
+        headers = get_cors_headers(policy, {'Origin': 'https://foo.com'},
+                                   'GET', {})
+        self.assertEqual(headers.get('Vary'), 'Origin')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for the static analysis of configured patterns
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask import Flask
+from flask_cors import CORS, cross_origin
+from flask_cors.core import *
+from flask_cors.patterns import analyze_pattern, check_patterns
+
+UNSAFE_PATTERNS = [r'(a+)+', r'(a*)*b', r'(\w+\s?)*$', r'(.*,)*',
+                   r'^(([a-z])+.)+[A-Z]([a-z])+$', r'(x+x+)+y', r'(a|a)*',
+                   r'(a|b|ab)*c', r'.*a.*b', re.compile(r'(A+)+', re.I)]
+
+SAFE_PATTERNS = [r'.*', r'/*', r'/api/.*', r'http://foo.com', r'[',
+                 r'https?://(\w+\.)*example\.com', r'.*\.example\.com',
+                 r'.*foo.*', r'([^/]+/)*x', r'(?:a{1,3})+', r'/users/\d+/.*',
+                 r'https://*.example.com', r'http://localhost:*']
+
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class PatternSafetyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.handler = CapturingHandler()
+        logging.getLogger('flask.ext.cors').addHandler(self.handler)
+
+    def tearDown(self):
+        logging.getLogger('flask.ext.cors').removeHandler(self.handler)
+
+    def test_unsafe_patterns(self):
+        for pattern in UNSAFE_PATTERNS:
+            self.assertTrue(analyze_pattern(pattern), pattern)
+
+    def test_safe_patterns(self):
+        for pattern in SAFE_PATTERNS:
+            self.assertEqual(analyze_pattern(pattern), [], pattern)
+
+    def test_warn_once(self):
+        check_patterns([r'(b+)+'], 'origins')
+        check_patterns([r'(b+)+'], 'origins', 'warn')
+        self.assertEqual(len(self.handler.messages), 1)
+        self.assertTrue('(b+)+' in self.handler.messages[0])
+        self.assertTrue('origins' in self.handler.messages[0])
+
+    def test_error(self):
+        self.assertRaises(ValueError, serialize_options,
+                          {'origins': r'https://(\w+)+\.example\.com',
+                           'pattern_safety': 'error'})
+        self.assertRaises(ValueError, serialize_options,
+                          {'allow_headers': r'(x-\w+)*',
+                           'pattern_safety': 'error'})
+        self.assertRaises(ValueError, get_config_resources, {},
+                          {'resources': {r'/(\w+/?)*': {}},
+                           'pattern_safety': 'error'})
+        self.assertRaises(ValueError, serialize_options,
+                          {'pattern_safety': 'sometimes'})
+
+    def test_extension_resources(self):
+        app = Flask(__name__)
+        self.assertRaises(ValueError, CORS, app,
+                          resources={r'/(\w+/?)*': {}},
+                          pattern_safety='error')
+
+    def test_decorator(self):
+        self.assertRaises(ValueError, cross_origin,
+                          origins=r'http://(a+)+\.com', pattern_safety='error')
+        self.assertRaises(ValueError, cross_origin,
+                          allow_headers=[r'(x-\w+)*'], pattern_safety='error')
+        cross_origin(origins=r'http://(a+)+\.com', pattern_safety='off')
+
+    def test_off(self):
+        serialize_options({'origins': r'(c+)+', 'pattern_safety': 'off'})
+        serialize_options({'origins': r'(c+)+', 'pattern_safety': False})
+        self.assertEqual(self.handler.messages, [])
+
+    def test_max_match_length(self):
+        policy = compile_policy(serialize_options({
+            'origins': [r'http://.*\.foo\.com', 'http://www.long-origin.com'],
+            'allow_headers': [r'X-.*'],
+            'max_match_length': 20,
+        }))
+        self.assertTrue(match_origin(policy, 'http://a.foo.com'))
+        self.assertFalse(match_origin(policy, 'http://abcdefgh.foo.com'))
+        # Literal origins are matched whatever their length
+        self.assertTrue(match_origin(policy, 'http://www.long-origin.com'))
+        self.assertEqual(get_allow_headers(policy, 'X-Foo, X-%s' % ('a' * 20)),
+                         'X-Foo')
+
+    def test_router_max_length(self):
+        router = ResourceRouter([(r'/users/\d+', {}), (r'/api/.*', {})],
+                                max_length=10)
+        self.assertEqual(router.match('/users/1')[0], r'/users/\d+')
+        self.assertEqual(router.match('/users/12345678'), None)
+        self.assertEqual(router.match('/api/v1/users/1')[0], r'/api/.*')
+
+
+if __name__ == "__main__":
+    unittest.main()
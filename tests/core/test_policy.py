@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for compiled CORS policies
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import gc
+import weakref
+from datetime import timedelta
+from werkzeug.datastructures import Headers
+from flask_cors.core import *
+
+
+class CorsPolicyTestCase(unittest.TestCase):
+    def test_compiled_fields(self):
+        policy = compile_policy(serialize_options({
+            'origins': ['http://foo.com', 'http://bar.com'],
+            'methods': ['get', 'post'],
+            'expose_headers': ['X-B', 'X-A'],
+            'supports_credentials': True,
+            'max_age': timedelta(minutes=1),
+            'vary_header': True,
+        }))
+
+        self.assertEqual(policy.methods, frozenset(['GET', 'POST']))
+        self.assertEqual(policy.methods_header, 'GET, POST')
+        self.assertEqual(policy.expose_headers, 'X-A, X-B')
+        self.assertEqual(policy.credentials, 'true')
+        self.assertEqual(policy.max_age, '60')
+        self.assertFalse(policy.is_wildcard)
+        self.assertTrue(policy.needs_vary)
+
+    def test_wildcard(self):
+        policy = compile_policy(serialize_options({
+            'origins': ['*', 'http://foo.com'],
+            'send_wildcard': True,
+            'vary_header': True,
+        }))
+        self.assertTrue(policy.is_wildcard)
+        # The allowed origin is always '*', so never varies
+        self.assertFalse(policy.needs_vary)
+
+    def test_immutable(self):
+        policy = compile_policy(serialize_options({'origins': '*'}))
+        self.assertRaises(AttributeError, setattr, policy, 'is_wildcard', False)
+        self.assertRaises(AttributeError, setattr, policy, 'foo', 1)
+        self.assertRaises(AttributeError, delattr, policy, 'methods')
+
+    def test_interned(self):
+        options = {'origins': ['http://foo.com'], 'methods': ['GET']}
+        policy = compile_policy(serialize_options(options))
+        self.assertTrue(compile_policy(serialize_options(options)) is policy)
+        self.assertTrue(as_policy(policy) is policy)
+
+        other = compile_policy(serialize_options({'origins': 'http://bar.com',
+                                                  'methods': ['GET']}))
+        self.assertFalse(other is policy)
+
+    def test_recent_policies_kept(self):
+        # Policies of options passed as dictionaries are not collected, and
+        # recompiled, once the call which compiled them returns.
+        options = serialize_options({'origins': 'http://recent.com'})
+        policy = weakref.ref(as_policy(options))
+        gc.collect()
+        self.assertTrue(policy() is not None)
+        self.assertTrue(as_policy(options) is policy())
+
+    def test_unhashable_options(self):
+        options = serialize_options({'origins': '*', 'foo': bytearray()})
+        policy = compile_policy(options)
+        self.assertFalse(compile_policy(options) is policy)
+        self.assertTrue(policy.is_wildcard)
+
+    def test_method_matching_is_exact(self):
+        policy = compile_policy(serialize_options({'origins': '*',
+                                                   'methods': ['GET']}))
+        headers = get_cors_headers(policy, {'Origin': 'http://foo.com',
+                                            ACL_REQUEST_METHOD: 'GE'},
+                                   'OPTIONS', {})
+        self.assertFalse(ACL_METHODS in headers)
+
+    def test_prerendered_headers(self):
+        policy = compile_policy(serialize_options({
+            'origins': '*',
+            'methods': ['GET'],
+            'expose_headers': 'X-Foo',
+            'max_age': 600,
+        }))
+        self.assertEqual(policy.response_headers,
+                         ((ACL_EXPOSE_HEADERS, 'X-Foo'),))
+        self.assertEqual(policy.preflight_headers,
+                         ((ACL_MAX_AGE, '600'), (ACL_METHODS, 'GET')))
+        self.assertEqual(policy.wildcard_headers,
+                         ((ACL_ORIGIN, '*'), (ACL_EXPOSE_HEADERS, 'X-Foo')))
+
+    def test_extend_headers(self):
+        headers = Headers([('Content-Type', 'text/plain')])
+        extend_headers(headers, ((ACL_ORIGIN, '*'), ('Vary', 'Origin')))
+        self.assertEqual(headers.get(ACL_ORIGIN), '*')
+
+        # Existing headers are replaced, rather than duplicated
+        extend_headers(headers, ((ACL_ORIGIN, 'http://foo.com'),
+                                 ('Vary', 'Origin, Cookie')))
+        self.assertEqual(headers.getlist(ACL_ORIGIN), ['http://foo.com'])
+        self.assertEqual(headers.getlist('Vary'), ['Origin, Cookie'])
+
+
+if __name__ == "__main__":
+    unittest.main()
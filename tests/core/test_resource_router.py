@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for the compiled resource router
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from werkzeug.routing import Rule
+from flask_cors.core import *
+
+PATHS = ['/', '/api', '/API/v1/users', '/api/v1/', '/api/v2/users/1',
+         '/foo', '/foo.json', '/foobar', '/static/app.js', '/[', '/users/42',
+         '/users/42/posts', '/aa', '']
+
+
+def naive_match(resources, path):
+    for pattern, options in resources:
+        if try_match(path, pattern):
+            return pattern, options
+    return None
+
+
+class ResourceRouterTestCase(unittest.TestCase):
+    def assertMatchesNaive(self, resources):
+        router = ResourceRouter(resources)
+        for path in PATHS:
+            self.assertEqual(router.match(path), naive_match(resources, path),
+                             "Mismatch for path %r" % path)
+
+    def test_literal_prefix(self):
+        self.assertEqual(get_literal_prefix(r'/api/v1/.*'), '/api/v1/')
+        self.assertEqual(get_literal_prefix(r'/api/*'), '/api')
+        self.assertEqual(get_literal_prefix(r'/foo'), '/foo')
+        self.assertEqual(get_literal_prefix(r'.*'), '')
+        self.assertEqual(get_literal_prefix(r'/foo.json'), None)
+        self.assertEqual(get_literal_prefix(r'/users/\d+'), None)
+        self.assertEqual(get_literal_prefix(re.compile(r'/api/.*')), None)
+
+    def test_sorted_dict_resources(self):
+        self.assertMatchesNaive(parse_resources({
+            r'/api/*': {'origins': 'a'},
+            r'/api/v1/.*': {'origins': 'b'},
+            r'/users/\d+$': {'origins': 'c'},
+            r'/users/\d+/.*': {'origins': 'd'},
+            r'/foo.json': {'origins': 'e'},
+            r'/*': {'origins': 'f'},
+        }))
+
+    def test_list_order_preserved(self):
+        self.assertMatchesNaive(parse_resources([
+            r'/.*', r'/api/v1/.*', r'/foo\.json', r'/users/(\d+)/posts'
+        ]))
+
+    def test_mixed_pattern_kinds(self):
+        self.assertMatchesNaive([
+            (r'/users/(\d+)/posts', {}),
+            (r'(a)\1', {}),
+            (re.compile(r'/API/v1/.*'), {}),
+            (r'/api/v2/.*', {}),
+            (r'[', {}),
+            (re.compile(r'/static/.*'), {}),
+            (r'/(?P<name>foo)(bar)?', {}),
+            (r'/(?i)aa', {}),
+        ])
+
+    def test_many_resources(self):
+        resources = [(r'/tenant%d/(v1|v2)/.*' % i, {}) for i in range(300)]
+        resources += [(r'/prefix%d/.*' % i, {}) for i in range(300)]
+        resources.append((r'/api/v1/.*', {}))
+        router = ResourceRouter(resources)
+
+        self.assertEqual(router.match('/tenant250/v2/users')[0],
+                         r'/tenant250/(v1|v2)/.*')
+        self.assertEqual(router.match('/prefix42/users')[0], r'/prefix42/.*')
+        self.assertEqual(router.match('/api/v1/users')[0], r'/api/v1/.*')
+        self.assertEqual(router.match('/unknown'), None)
+
+    def test_match_rule(self):
+        resources = parse_resources({
+            r'/api/*': {'origins': 'a'},
+            r'/api/v1/.*': {'origins': 'b'},
+            r'/*': {'origins': 'c'},
+        })
+        router = ResourceRouter(resources)
+
+        for rule_string, path in [('/api/<path:p>', '/api/v1/users'),
+                                  ('/api/<path:p>', '/api/v2/users'),
+                                  ('/api/v1/users/<int:id>', '/api/v1/users/1'),
+                                  ('/foo', '/foo'),
+                                  ('/<p>', '/api')]:
+            rule = Rule(rule_string)
+            for _ in range(2):
+                self.assertEqual(router.match_rule(rule, path),
+                                 router.match(path))
+
+    def test_match_rule_resolution(self):
+        router = ResourceRouter(parse_resources({
+            r'/api/*': {},
+            r'/api/v1/.*': {},
+            r'/users/\d+': {},
+        }))
+        resolved = lambda rule_string: router._resolve_rule(rule_string)[0]
+
+        self.assertTrue(resolved('/static'))
+        self.assertTrue(resolved('/api/v1/users/<id>'))
+        # /api/v1/.* takes precedence over /api/*, but only for some paths
+        self.assertFalse(resolved('/api/<path:p>'))
+        # /users/\d+ is a regular expression which may or may not match
+        self.assertFalse(resolved('/users/<id>'))
+
+        self.assertEqual(router.match_rule(None, '/api/v1/foo')[0],
+                         r'/api/v1/.*')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests for subdomain origin patterns
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from flask_cors.core import *
+from flask_cors.origins import *
+
+
+class SubdomainTrieTestCase(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_subdomain_pattern('HTTPS://*.Example.com'),
+                         ('https', 'example.com', None))
+        self.assertEqual(parse_subdomain_pattern('http://*.example.com:8080'),
+                         ('http', 'example.com', '8080'))
+        for origin in ['https://example.com', 'https://*example.com',
+                       'https://*.*.example.com', r'https://.*\.example\.com',
+                       'https://*.example.com/path']:
+            self.assertEqual(parse_subdomain_pattern(origin), None, origin)
+
+    def test_internationalized_host(self):
+        self.assertEqual(parse_subdomain_pattern(u'https://*.B\u00fccher.de'),
+                         ('https', 'xn--bcher-kva.de', None))
+        policy = compile_policy(serialize_options({
+            'origins': [u'https://*.b\u00fccher.de']}))
+        self.assertEqual(policy.origins_regex, ())
+        self.assertTrue(match_origin(policy, 'https://a.xn--bcher-kva.de'))
+        self.assertTrue(match_origin(policy, u'https://a.b\u00fccher.de'))
+        self.assertFalse(match_origin(policy, 'https://xn--bcher-kva.de'))
+
+    def test_match(self):
+        trie = SubdomainTrie(['https://*.example.com',
+                              'http://*.example.com:8080',
+                              'https://*.api.other.com'])
+        for origin in ['https://a.example.com', 'https://a.b.example.com',
+                       'http://a.example.com:8080', 'https://v1.api.other.com']:
+            self.assertTrue(trie.match(origin), origin)
+
+        for origin in ['https://example.com', 'http://a.example.com',
+                       'https://a.example.com:8443', 'https://a.example.org',
+                       'https://a.other.com', 'https://api.other.com',
+                       'https://.example.com', 'https://a.example.com.evil.com',
+                       'example.com', 'https://']:
+            self.assertFalse(trie.match(origin), origin)
+
+    def test_policy(self):
+        policy = compile_policy(serialize_options({
+            'origins': ['https://*.customer%d.com' % i for i in range(1000)],
+            'vary_header': True,
+        }))
+        self.assertEqual(policy.origins_regex, ())
+        self.assertEqual(get_cors_origin(policy, 'https://App.Customer999.com'),
+                         'https://App.Customer999.com')
+        self.assertEqual(get_cors_origin(policy, 'https://customer999.com'),
+                         None)
+
+        policy = compile_policy(serialize_options({
+            'origins': 'https://*.customer.com',
+            'vary_header': True,
+        }))
+        headers = get_cors_headers(policy, {'Origin': 'https://a.customer.com'},
+                                   'GET', {})
+        self.assertEqual(headers.get('Vary'), 'Origin')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+    test
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..base_test import FlaskCorsTestCase
+from flask import Flask
+
+from flask_cors import *
+from flask_cors.core import *
+
+
+class ConfigChangesTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['CORS_ORIGINS'] = 'http://foo.com'
+
+        @self.app.route('/')
+        @cross_origin()
+        def index():
+            return 'Welcome!'
+
+    def test_config_replaced(self):
+        '''
+            The decorator computes its options once, but must notice when the
+            app's CORS configuration is replaced between requests.
+        '''
+        resp = self.get('/', origin='http://foo.com')
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://foo.com')
+
+        self.app.config['CORS_ORIGINS'] = 'http://bar.com'
+        resp = self.get('/', origin='http://foo.com')
+        self.assertFalse(ACL_ORIGIN in resp.headers)
+        resp = self.get('/', origin='http://bar.com')
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://bar.com')
+
+    def test_config_added(self):
+        self.get('/', origin='http://foo.com')
+
+        self.app.config['CORS_EXPOSE_HEADERS'] = 'X-Total-Count'
+        resp = self.get('/', origin='http://foo.com')
+        self.assertEqual(resp.headers.get(ACL_EXPOSE_HEADERS), 'X-Total-Count')
+
+    def test_config_key(self):
+        key = get_app_config_key(self.app)
+        self.assertEqual(key, get_app_config_key(self.app))
+
+        self.app.config['CORS_MAX_AGE'] = 600
+        self.assertNotEqual(key, get_app_config_key(self.app))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+    test
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import threading
+
+from ..base_test import FlaskCorsTestCase
+from flask import Flask, abort
+
+from flask_cors import *
+from flask_cors.core import *
+from flask_cors.metrics import CorsMetrics
+
+
+class MetricsTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.cors = CORS(self.app, metrics=True, decision_cache_size=16,
+                         resources={r'/api/*': {'origins': 'http://foo.com'}})
+
+        @self.app.route('/api/foo')
+        def api():
+            return 'Welcome!'
+
+        @self.app.route('/other')
+        def other():
+            return 'Welcome!'
+
+    def test_stats(self):
+        self.get('/api/foo', origin='http://foo.com')
+        self.get('/api/foo', origin='http://foo.com')
+        self.get('/api/foo', origin='http://bar.com')
+        self.preflight('/api/foo', origin='http://foo.com')
+        self.get('/api/foo')
+        self.get('/other', origin='http://foo.com')
+
+        stats = self.cors.stats()
+        self.assertEqual(stats['counters'], dict(requests=6, simple=3,
+                                                 preflight=1, allowed=3,
+                                                 rejected=1, no_origin=1,
+                                                 unmatched=1))
+        self.assertEqual(stats['resources'], {r'/api/*': 5})
+        self.assertEqual(stats['latency']['count'], 6)
+        self.assertEqual(sum(n for _, n in stats['latency']['histogram']), 6)
+        self.assertEqual(stats['decision_cache'][r'/api/*']['hits'], 1)
+
+    def test_exceptions_recorded_once(self):
+        app = Flask(__name__)
+        cors = CORS(app, metrics=True,
+                    resources={r'/api/*': {'origins': 'http://foo.com'}})
+
+        @app.route('/api/boom')
+        def boom():
+            abort(404)
+
+        # Responses to views which raise pass through the after_request
+        # handler twice, as exceptions are intercepted
+        client = app.test_client()
+        self.assertEqual(client.get('/api/boom').status_code, 404)
+        for origin in 'http://bar.com', 'http://foo.com':
+            client.get('/api/boom', headers={'Origin': origin})
+
+        stats = cors.stats()
+        self.assertEqual(stats['counters'], dict(requests=3, no_origin=1,
+                                                 simple=2, rejected=1,
+                                                 allowed=1))
+        self.assertEqual(stats['latency']['count'], 3)
+
+    def test_disabled_by_default(self):
+        app = Flask(__name__)
+        cors = CORS(app)
+
+        @app.route('/')
+        def index():
+            return 'Welcome!'
+
+        app.test_client().get('/', headers={'Origin': 'http://foo.com'})
+        self.assertEqual(cors.stats()['counters'], {})
+
+
+class CorsMetricsTestCase(FlaskCorsTestCase):
+    def test_threads(self):
+        metrics = CorsMetrics()
+
+        def record():
+            for _ in range(100):
+                metrics.record(('requests',), '/api', 1000)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = metrics.snapshot()
+        self.assertEqual(stats['counters'], {'requests': 400})
+        self.assertEqual(stats['resources'], {'/api': 400})
+        self.assertEqual(stats['latency']['histogram'], [(1024, 400)])
+        self.assertEqual(stats['latency']['mean_ns'], 1000)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()['counters'], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
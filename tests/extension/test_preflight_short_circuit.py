@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+    test
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..base_test import FlaskCorsTestCase
+from flask import Flask
+
+from flask_cors import *
+from flask_cors.core import *
+
+
+class PreflightShortCircuitTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        CORS(self.app, resources={
+            r'/api/*': {'short_circuit_preflight': True,
+                        'origins': 'http://foo.com',
+                        'methods': ['GET', 'POST']},
+            r'/other/*': {}
+        })
+        self.calls = []
+
+        @self.app.before_request
+        def before():
+            self.calls.append('before_request')
+
+        @self.app.route('/api/foo', methods=['GET', 'POST', 'OPTIONS'])
+        def api():
+            self.calls.append('view')
+            return 'Welcome!'
+
+        @self.app.route('/api/decorated', methods=['GET', 'OPTIONS'])
+        @cross_origin(origins='http://bar.com')
+        def decorated():
+            return 'Welcome!'
+
+        @self.app.route('/other/foo', methods=['GET', 'OPTIONS'])
+        def other():
+            self.calls.append('view')
+            return 'Welcome!'
+
+    def test_short_circuit(self):
+        resp = self.preflight('/api/foo', method='POST',
+                              origin='http://foo.com')
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://foo.com')
+        self.assertEqual(resp.headers.get(ACL_METHODS), 'GET, POST')
+        self.assertEqual(self.calls, [])
+
+    def test_invalid_preflight(self):
+        for origin, method in [('http://bar.com', 'POST'),
+                               ('http://foo.com', 'DELETE')]:
+            resp = self.preflight('/api/foo', method=method, origin=origin)
+            self.assertEqual(resp.status_code, 200)
+            self.assertFalse(ACL_METHODS in resp.headers)
+        self.assertEqual(self.calls, ['before_request', 'view'] * 2)
+
+    def test_not_preflight(self):
+        resp = self.options('/api/foo', origin='http://foo.com')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.calls, ['before_request', 'view'])
+
+    def test_decorated_view(self):
+        resp = self.preflight('/api/decorated', origin='http://bar.com')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://bar.com')
+
+    def test_disabled_by_default(self):
+        resp = self.preflight('/other/foo', origin='http://foo.com')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(ACL_METHODS in resp.headers)
+        self.assertEqual(self.calls, ['before_request', 'view'])
+
+
+if __name__ == "__main__":
+    unittest.main()
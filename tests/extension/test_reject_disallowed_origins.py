@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+    test
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..base_test import FlaskCorsTestCase
+from flask import Flask
+
+from flask_cors import *
+from flask_cors.core import *
+
+
+class RejectDisallowedOriginsTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        CORS(self.app, resources={
+            r'/api/*': {'reject_disallowed_origins': True,
+                        'origins': 'http://foo.com'},
+            r'/other/*': {'origins': 'http://foo.com'}
+        })
+        self.calls = []
+
+        @self.app.route('/api/foo', methods=['GET', 'POST', 'OPTIONS'])
+        def api():
+            self.calls.append('view')
+            return 'Welcome!'
+
+        @self.app.route('/other/foo')
+        def other():
+            self.calls.append('view')
+            return 'Welcome!'
+
+    def test_disallowed_origin_rejected(self):
+        resp = self.get('/api/foo', origin='http://bar.com')
+        self.assertEqual(resp.status_code, 403)
+        self.assertFalse(ACL_ORIGIN in resp.headers)
+
+        resp = self.preflight('/api/foo', method='POST', origin='http://bar.com')
+        self.assertEqual(resp.status_code, 403)
+        self.assertEqual(self.calls, [])
+
+    def test_allowed_origin(self):
+        resp = self.get('/api/foo', origin='http://foo.com')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://foo.com')
+        self.assertEqual(self.calls, ['view'])
+
+    def test_same_origin_and_no_origin(self):
+        self.assertEqual(self.get('/api/foo', origin='http://localhost').status_code, 200)
+        self.assertEqual(self.get('/api/foo').status_code, 200)
+        self.assertEqual(self.calls, ['view', 'view'])
+
+    def test_other_resources_unaffected(self):
+        resp = self.get('/other/foo', origin='http://bar.com')
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(ACL_ORIGIN in resp.headers)
+
+    def test_status_and_body(self):
+        app = Flask(__name__)
+        CORS(app, origins='http://foo.com', reject_disallowed_origins=True,
+             reject_status=400, reject_body='Origin not allowed')
+
+        @app.route('/')
+        def index():
+            return 'Welcome!'
+
+        with app.test_client() as c:
+            resp = c.get('/', headers={'Origin': 'http://bar.com'})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data, b'Origin not allowed')
+
+
+class DecoratorRejectDisallowedOriginsTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.calls = []
+
+        @self.app.route('/')
+        @cross_origin(origins='http://foo.com', reject_disallowed_origins=True)
+        def index():
+            self.calls.append('view')
+            return 'Welcome!'
+
+    def test_rejected(self):
+        for verb in ['get', 'options']:
+            resp = self._request(verb, '/', origin='http://bar.com')
+            self.assertEqual(resp.status_code, 403)
+        self.assertEqual(self.calls, [])
+
+    def test_allowed(self):
+        resp = self.get('/', origin='http://foo.com')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://foo.com')
+        self.assertEqual(self.get('/').status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+    test
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+import threading
+
+from ..base_test import FlaskCorsTestCase
+from flask import Flask
+
+from flask_cors import *
+from flask_cors.core import *
+
+
+class UpdateTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.cors = CORS(self.app, resources={r'/api/*': {'max_age': 600}},
+                         origins='http://foo.com')
+
+        @self.app.route('/api/foo', methods=['GET', 'OPTIONS'])
+        def api():
+            return 'Welcome!'
+
+    def test_update_origins(self):
+        resp = self.get('/api/foo', origin='http://bar.com')
+        self.assertFalse(ACL_ORIGIN in resp.headers)
+
+        self.cors.update(origins=['http://foo.com', 'http://bar.com'])
+        resp = self.get('/api/foo', origin='http://bar.com')
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://bar.com')
+
+        # Resource level options still take precedence
+        resp = self.preflight('/api/foo', origin='http://bar.com')
+        self.assertEqual(resp.headers.get(ACL_MAX_AGE), '600')
+
+    def test_updates_accumulate(self):
+        self.cors.update(origins='http://bar.com')
+        self.cors.update(expose_headers='X-Total-Count')
+        resp = self.get('/api/foo', origin='http://bar.com')
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://bar.com')
+        self.assertEqual(resp.headers.get(ACL_EXPOSE_HEADERS), 'X-Total-Count')
+
+    def test_update_applies_config(self):
+        self.app.config['CORS_EXPOSE_HEADERS'] = 'X-Foo'
+        self.cors.update()
+        resp = self.get('/api/foo', origin='http://foo.com')
+        self.assertEqual(resp.headers.get(ACL_EXPOSE_HEADERS), 'X-Foo')
+
+    def test_update_enables_rejection(self):
+        self.assertEqual(self.get('/api/foo', origin='http://bar.com').status_code, 200)
+        self.cors.update(reject_disallowed_origins=True)
+        self.assertEqual(self.get('/api/foo', origin='http://bar.com').status_code, 403)
+
+    def test_concurrent_requests(self):
+        origins = ['http://foo.com', 'http://bar.com']
+        errors = []
+
+        def request_loop():
+            with self.app.test_client() as c:
+                for _ in range(50):
+                    resp = c.get('/api/foo', headers={'Origin': 'http://foo.com'})
+                    # foo.com is allowed by every published state
+                    if resp.headers.get(ACL_ORIGIN) != 'http://foo.com':
+                        errors.append(resp)
+
+        threads = [threading.Thread(target=request_loop) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for i in range(50):
+            self.cors.update(origins=origins[:1 + i % 2])
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+    Tests particular to the WSGI and ASGI middleware
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
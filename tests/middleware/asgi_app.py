@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+    A fake ASGI application for the ASGI middleware tests, kept apart as
+    it requires Python 3.5 or later.
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+
+def make_app(calls):
+    '''
+        Returns an ASGI application which records the path of each request
+        in the given list, and responds with a plain text body.
+    '''
+    async def app(scope, receive, send):
+        calls.append(scope['path'])
+        await send({'type': 'http.response.start',
+                    'status': 200,
+                    'headers': [(b'content-type', b'text/plain'),
+                                (b'vary', b'Accept-Encoding')]})
+        await send({'type': 'http.response.body', 'body': b'Welcome!'})
+    return app
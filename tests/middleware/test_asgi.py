@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+    test
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+from ..base_test import FlaskCorsTestCase, unittest
+
+import time
+import threading
+from flask_cors.core import *
+from flask_cors.stores import OriginStore
+try:
+    import asyncio
+    from flask_cors.asgi import CORSMiddleware
+    from .asgi_app import make_app
+except (ImportError, SyntaxError):  # Python < 3.5
+    CORSMiddleware = None
+
+
+class SlowStore(OriginStore):
+    def __init__(self, origins):
+        self.origins = set(origins)
+        self.threads = []
+
+    def lookup(self, origins):
+        self.threads.append(threading.current_thread())
+        time.sleep(0.2)
+        return self.origins.intersection(origins)
+
+
+def resolved():
+    future = asyncio.Future()
+    future.set_result(None)
+    return future
+
+
+@unittest.skipIf(CORSMiddleware is None, 'ASGI requires Python 3.5')
+class ASGIMiddlewareTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.calls = []
+        self.middleware = CORSMiddleware(make_app(self.calls), resources={
+            r'/api/*': {'origins': ['http://foo.com', 'http://bar.com'],
+                        'methods': ['GET', 'POST']}
+        })
+
+    def request(self, path, method='GET', headers=None, scope_type='http',
+                ticks=None):
+        scope = {'type': scope_type, 'method': method, 'path': path,
+                 'root_path': '',
+                 'headers': [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                             for k, v in (headers or {}).items()]}
+        messages = []
+
+        def send(message):
+            messages.append(message)
+            return resolved()
+
+        loop = asyncio.new_event_loop()
+
+        # Counts the iterations of the loop while the request is handled
+        def tick():
+            ticks.append(loop.time())
+            loop.call_later(0.01, tick)
+        if ticks is not None:
+            loop.call_soon(tick)
+
+        try:
+            loop.run_until_complete(
+                self.middleware(scope, resolved, send))
+        finally:
+            loop.close()
+
+        start = messages[0]
+        return start['status'], dict(
+            (k.decode('latin-1').title(), v.decode('latin-1'))
+            for k, v in start['headers'])
+
+    def test_simple_request(self):
+        status, headers = self.request('/api/foo',
+                                       headers={'Origin': 'http://foo.com'})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers.get(ACL_ORIGIN), 'http://foo.com')
+        self.assertEqual(headers.get('Vary'), 'Origin, Accept-Encoding')
+        self.assertEqual(self.calls, ['/api/foo'])
+
+    def test_unmatched(self):
+        for path, origin in [('/api/foo', 'http://baz.com'),
+                             ('/foo', 'http://foo.com'),
+                             ('/api/foo', None)]:
+            status, headers = self.request(
+                path, headers={'Origin': origin} if origin else {})
+            self.assertEqual(status, 200)
+            self.assertFalse(ACL_ORIGIN in headers)
+            self.assertEqual(headers.get('Vary'), 'Accept-Encoding')
+
+    def test_preflight(self):
+        status, headers = self.request('/api/foo', method='OPTIONS', headers={
+            'Origin': 'http://foo.com',
+            ACL_REQUEST_METHOD: 'POST',
+            ACL_REQUEST_HEADERS: 'X-Foo'
+        })
+        self.assertEqual(status, 204)
+        self.assertEqual(headers.get(ACL_ORIGIN), 'http://foo.com')
+        self.assertEqual(headers.get(ACL_METHODS), 'GET, POST')
+        self.assertEqual(headers.get(ACL_ALLOW_HEADERS), 'X-Foo')
+        self.assertEqual(self.calls, [])
+
+    def test_invalid_preflight(self):
+        status, headers = self.request('/api/foo', method='OPTIONS', headers={
+            'Origin': 'http://foo.com',
+            ACL_REQUEST_METHOD: 'DELETE'
+        })
+        self.assertEqual(status, 200)
+        self.assertFalse(ACL_METHODS in headers)
+        self.assertEqual(self.calls, ['/api/foo'])
+
+    def test_reject_disallowed_origins(self):
+        self.middleware = CORSMiddleware(make_app(self.calls),
+                                         origins='http://foo.com',
+                                         reject_disallowed_origins=True,
+                                         reject_status=451)
+        status, headers = self.request('/api/foo',
+                                       headers={'Origin': 'http://bar.com'})
+        self.assertEqual(status, 451)
+        self.assertEqual(self.calls, [])
+
+        # Allowed and same-origin requests reach the application
+        for origin in 'http://foo.com', 'http://localhost:8000':
+            status, headers = self.request('/api/foo', headers={
+                'Origin': origin, 'Host': 'localhost:8000'})
+            self.assertEqual(status, 200)
+        self.assertEqual(self.calls, ['/api/foo', '/api/foo'])
+
+    def test_slow_origin_store(self):
+        store = SlowStore(['http://baz.com'])
+        self.middleware = CORSMiddleware(make_app(self.calls),
+                                         origins=['http://foo.com', store])
+        ticks = []
+        status, headers = self.request('/api/foo', ticks=ticks,
+                                       headers={'Origin': 'http://baz.com'})
+        self.assertEqual(headers.get(ACL_ORIGIN), 'http://baz.com')
+        # The store was consulted once, off the event loop, which kept running
+        self.assertEqual(len(store.threads), 1)
+        self.assertNotEqual(store.threads[0], threading.current_thread())
+        self.assertTrue(len(ticks) > 5)
+
+        # The store's answer is cached
+        for origin in 'http://baz.com', 'http://foo.com':
+            status, headers = self.request('/api/foo',
+                                           headers={'Origin': origin})
+            self.assertEqual(headers.get(ACL_ORIGIN), origin)
+        self.assertEqual(len(store.threads), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+    test
+    ~~~~
+    Flask-CORS is a simple extension to Flask allowing you to support cross
+    origin resource sharing (CORS) using a simple decorator.
+
+    :copyright: (c) 2014 by Cory Dolphin.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..base_test import FlaskCorsTestCase
+from flask import Flask, Response
+from werkzeug.test import Client
+
+from flask_cors import *
+from flask_cors.core import *
+from flask_cors.wsgi import CORSMiddleware
+
+
+class WSGIMiddlewareTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.calls = []
+
+        def app(environ, start_response):
+            self.calls.append(environ['PATH_INFO'])
+            start_response('200 OK', [('Content-Type', 'text/plain'),
+                                      ('Vary', 'Accept-Encoding')])
+            return [b'Welcome!']
+
+        self.client = Client(
+            CORSMiddleware(app, resources={
+                r'/api/*': {'origins': ['http://foo.com', 'http://bar.com'],
+                            'methods': ['GET', 'POST']}
+            }),
+            Response)
+
+    def test_simple_request(self):
+        resp = self.client.get('/api/foo',
+                               headers={'Origin': 'http://foo.com'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://foo.com')
+        self.assertEqual(resp.headers.get('Vary'), 'Origin, Accept-Encoding')
+        self.assertEqual(self.calls, ['/api/foo'])
+
+    def test_unmatched(self):
+        for path, origin in [('/api/foo', 'http://baz.com'),
+                             ('/foo', 'http://foo.com'),
+                             ('/api/foo', None)]:
+            headers = {'Origin': origin} if origin else {}
+            resp = self.client.get(path, headers=headers)
+            self.assertEqual(resp.status_code, 200)
+            self.assertFalse(ACL_ORIGIN in resp.headers)
+            self.assertEqual(resp.headers.get('Vary'), 'Accept-Encoding')
+
+    def test_preflight(self):
+        resp = self.client.open('/api/foo', method='OPTIONS', headers={
+            'Origin': 'http://foo.com',
+            ACL_REQUEST_METHOD: 'POST',
+            ACL_REQUEST_HEADERS: 'X-Foo'
+        })
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://foo.com')
+        self.assertEqual(resp.headers.get(ACL_METHODS), 'GET, POST')
+        self.assertEqual(resp.headers.get(ACL_ALLOW_HEADERS), 'X-Foo')
+        self.assertEqual(self.calls, [])
+
+    def test_invalid_preflight(self):
+        resp = self.client.open('/api/foo', method='OPTIONS', headers={
+            'Origin': 'http://foo.com',
+            ACL_REQUEST_METHOD: 'DELETE'
+        })
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(ACL_METHODS in resp.headers)
+        self.assertEqual(self.calls, ['/api/foo'])
+
+    def test_reject_disallowed_origins(self):
+        def app(environ, start_response):
+            self.calls.append(environ['PATH_INFO'])
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'Welcome!']
+
+        client = Client(CORSMiddleware(app, origins='http://foo.com',
+                                       reject_disallowed_origins=True,
+                                       reject_body='Go away'),
+                        Response)
+        resp = client.get('/api/foo', headers={'Origin': 'http://bar.com'})
+        self.assertEqual(resp.status_code, 403)
+        self.assertEqual(resp.data, b'Go away')
+        self.assertEqual(self.calls, [])
+
+        # Allowed and same-origin requests reach the application
+        for origin in 'http://foo.com', 'http://localhost':
+            resp = client.get('/api/foo', headers={'Origin': origin})
+            self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.calls, ['/api/foo', '/api/foo'])
+
+
+class WSGIMiddlewareFlaskTestCase(FlaskCorsTestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['CORS_ORIGINS'] = 'http://foo.com'
+        self.app.wsgi_app = CORSMiddleware(self.app.wsgi_app,
+                                           config=self.app.config)
+
+        @self.app.route('/')
+        def index():
+            return 'Welcome!'
+
+        @self.app.route('/decorated')
+        @cross_origin(origins='http://bar.com')
+        def decorated():
+            return 'Welcome!'
+
+    def test_config(self):
+        resp = self.get('/', origin='http://foo.com')
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://foo.com')
+        resp = self.get('/', origin='http://bar.com')
+        self.assertFalse(ACL_ORIGIN in resp.headers)
+
+    def test_already_evaluated(self):
+        resp = self.get('/decorated', origin='http://bar.com')
+        self.assertEqual(resp.headers.get(ACL_ORIGIN), 'http://bar.com')
+
+
+if __name__ == "__main__":
+    unittest.main()